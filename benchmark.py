@@ -0,0 +1,217 @@
+"""End-to-end latency and throughput of the flows.
+
+Runs every flow N times through the parallel runner and reports, per
+flow, p50/p95/p99 of the flow's own time (browser launch and login
+excluded), flows per minute at the given worker count and the browsers'
+resident memory. Reports are JSON; a saved baseline turns them into a
+regression check:
+
+    python benchmark.py --standin -n 4 --iterations 10 --update-baseline
+    python benchmark.py --standin -n 4 --iterations 10 --baseline
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+
+def percentile(values, p):
+    """p-th percentile (0-100) of `values`, interpolating between ranks"""
+    values = sorted(values)
+    if not values:
+        return None
+    rank = (len(values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def summarize(results, elapsed, workers, target, iterations):
+    """Benchmark report (a JSON-able dict) from the runner's flow results"""
+    flows = {}
+    for result in results:
+        flow = flows.setdefault(result["flow"], {"runs": 0, "passed": 0, "times": []})
+        flow["runs"] += 1
+        if result["passed"]:
+            flow["passed"] += 1
+            flow["times"].append(result.get("flow_time") or result["duration"])
+
+    for flow in flows.values():
+        times = flow.pop("times")
+        flow.update({
+            "p50": percentile(times, 50), "p95": percentile(times, 95), "p99": percentile(times, 99),
+            "mean": sum(times) / len(times) if times else None,
+            "min": min(times, default=None), "max": max(times, default=None),
+        })
+
+    rss = [r["browser_rss"] for r in results if r.get("browser_rss")]
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "target": target,
+        "workers": workers,
+        "iterations": iterations,
+        "elapsed": elapsed,
+        "flows_per_minute": len(results) / elapsed * 60 if elapsed else None,
+        "browser_rss_mb": {
+            "mean": sum(rss) / len(rss) / 2**20 if rss else None,
+            "max": max(rss) / 2**20 if rss else None,
+        },
+        "flows": flows,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def read_report(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    return path
+
+
+def check_baseline(report, baseline, tolerance):
+    """Messages for every number that got worse than baseline by more than `tolerance`"""
+    violations = []
+    for name, flow in report["flows"].items():
+        before = baseline["flows"].get(name, {}).get("p95")
+        if before and flow["p95"] and flow["p95"] > before * (1 + tolerance):
+            violations.append(f"{name}: p95 {flow['p95']:.2f}s, baseline {before:.2f}s")
+
+    before = baseline.get("flows_per_minute")
+    if before and report["flows_per_minute"] and report["flows_per_minute"] < before * (1 - tolerance):
+        violations.append(f"throughput {report['flows_per_minute']:.1f} flows/min, "
+                          f"baseline {before:.1f}")
+
+    before = baseline.get("browser_rss_mb", {}).get("max")
+    peak = report["browser_rss_mb"]["max"]
+    if before and peak and peak > before * (1 + tolerance):
+        violations.append(f"browser RSS {peak:.0f} MB, baseline {before:.0f} MB")
+    return violations
+
+
+def print_report(report):
+    print(f"\n{'flow':<16} {'runs':>5} {'ok':>4} {'p50':>7} {'p95':>7} {'p99':>7}")
+    for name, flow in report["flows"].items():
+        times = " ".join(f"{flow[key]:>6.2f}s" if flow[key] is not None else f"{'-':>7}"
+                         for key in ("p50", "p95", "p99"))
+        print(f"{name:<16} {flow['runs']:>5} {flow['passed']:>4} {times}")
+    print(f"\n{report['flows_per_minute']:.1f} flows/min on {report['workers']} workers")
+    if report["browser_rss_mb"]["max"] is not None:
+        print(f"Browser RSS: mean {report['browser_rss_mb']['mean']:.0f} MB, "
+              f"max {report['browser_rss_mb']['max']:.0f} MB")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MantisBT flows")
+    parser.add_argument("flows", nargs="*", help="flows to run (default: all)")
+    parser.add_argument("-n", "--workers", type=int, help="number of worker processes")
+    parser.add_argument("--iterations", type=int, help="runs of each flow")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--target", help="MantisBT base URL (default: MANTIS_BASE_URL)")
+    target.add_argument("--standin", action="store_true",
+                        help="benchmark against an in-memory stand-in (mantis_standin.py)")
+    parser.add_argument("--browser", help="browser profile (see browser.PROFILES)")
+    parser.add_argument("--screenshots", choices=("off", "failure-only", "keyframes", "full"),
+                        help="which steps get a screenshot")
+    parser.add_argument("-o", "--output", help="report path (default: benchmarks/bench-<time>.json)")
+    parser.add_argument("--baseline", nargs="?", const="", metavar="PATH",
+                        help="fail when a flow is slower than the baseline report")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="save this report as the new baseline")
+    args = parser.parse_args(argv)
+
+    # config reads MANTIS_BASE_URL when it is first imported, so point it at
+    # the target before importing anything that uses it
+    if args.standin:
+        os.environ["MANTIS_BASE_URL"] = f"http://127.0.0.1:{free_port()}/mantis"
+    elif args.target:
+        os.environ["MANTIS_BASE_URL"] = args.target
+
+    import runner
+    from config import (BASE_URL, WORKERS, HEADLESS, BROWSER_PROFILE, SCREENSHOT_POLICY,
+                        BENCHMARK_DIR, BENCHMARK_BASELINE, BENCHMARK_ITERATIONS, BENCHMARK_TOLERANCE)
+
+    flows = args.flows or list(runner.FLOWS)
+    unknown = [flow for flow in flows if flow not in runner.FLOWS]
+    if unknown:
+        parser.error(f"unknown flow(s): {', '.join(unknown)}")
+    workers = args.workers or WORKERS
+    iterations = args.iterations or BENCHMARK_ITERATIONS
+
+    server = None
+    if args.standin:
+        import mantis_standin
+        from urllib.parse import urlparse
+        server = mantis_standin.start(port=urlparse(BASE_URL).port)
+        print(f"🧪 Stand-in MantisBT at {BASE_URL}")
+
+    print("="*60)
+    print(f"MANTISBT BENCHMARK - {len(flows)} flows x {iterations} on {workers} workers")
+    print("="*60)
+
+    try:
+        start = time.time()
+        results = runner.run_suite(flows * iterations, workers=workers, headless=HEADLESS,
+                                   profile=args.browser or BROWSER_PROFILE,
+                                   screenshot_policy=args.screenshots or SCREENSHOT_POLICY)
+        elapsed = time.time() - start
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    report = summarize(results, elapsed, workers, "standin" if args.standin else BASE_URL, iterations)
+    print_report(report)
+    path = write_report(report, args.output or os.path.join(
+        BENCHMARK_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    print(f"Report: {path}")
+
+    violations = []
+    baseline_path = args.baseline or BENCHMARK_BASELINE
+    if args.update_baseline:
+        write_report(report, baseline_path)
+        print(f"Baseline updated: {baseline_path}")
+    elif args.baseline is not None:
+        baseline = read_report(baseline_path)
+        if baseline is None:
+            print(f"⚠ No baseline at {baseline_path}; create it with --update-baseline")
+        else:
+            if (baseline.get("workers"), baseline.get("target")) != (workers, report["target"]):
+                print(f"⚠ Baseline was taken with {baseline.get('workers')} workers "
+                      f"against {baseline.get('target')}")
+            violations = check_baseline(report, baseline, BENCHMARK_TOLERANCE)
+            for violation in violations:
+                print(f"❌ Regression - {violation}")
+
+    failed = sum(flow["runs"] - flow["passed"] for flow in report["flows"].values())
+    if failed:
+        print(f"❌ {failed} flow runs failed")
+    return 0 if not failed and not violations else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
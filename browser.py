@@ -0,0 +1,151 @@
+import os
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+import commands
+import flight_recorder
+import tracing
+import waits
+from driver_resolver import resolve_driver
+from config import BROWSER_PROFILE, BLOCKED_URLS, NETWORK_LOG
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; browser_rss() falls back to /proc on Linux
+    psutil = None
+
+# Chrome switches that cut background work the checks never rely on
+LEAN_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication",
+    # Parallel browsers all count as background windows; keep their timers running
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+]
+
+# headless: run without a window; block: apply BLOCKED_URLS; lean: add LEAN_ARGUMENTS
+PROFILES = {
+    "lean": {"headless": True, "block": True, "lean": True},    # default for runs
+    "full": {"headless": True, "block": False, "lean": False},  # every resource, e.g. for visual checks
+    "debug": {"headless": False, "block": False, "lean": False},
+}
+
+
+def block_resources(driver, patterns=BLOCKED_URLS):
+    """Stop the browser from fetching URLs matching `patterns` (CDP wildcards)"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except WebDriverException:
+        return False
+    return True
+
+
+def drain_performance_log(driver):
+    """Drop unread performance log entries, so they do not pile up in chromedriver"""
+    if getattr(driver, "network_log", False):
+        try:
+            driver.get_log("performance")
+        except WebDriverException:
+            pass
+
+
+@tracing.traced("create_driver", cat="browser")
+def create_driver(headless=None, profile=BROWSER_PROFILE, network_log=NETWORK_LOG):
+    """Start a Chrome session with the options shared by all test scripts.
+
+    `profile` is one of PROFILES; `headless` overrides the profile's choice
+    when given. `network_log` turns on the CDP performance log that
+    waits.network_idle reads.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown browser profile '{profile}', expected one of {tuple(PROFILES)}")
+    settings = PROFILES[profile]
+    if headless is None:
+        headless = settings["headless"]
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-software-rasterizer")
+    if settings["lean"]:
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+
+    if network_log:
+        # Expose CDP Network events to waits.network_idle
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    if headless:
+        options.add_argument("--headless=new")
+
+    driver = webdriver.Chrome(
+        service=Service(resolve_driver()),
+        options=options
+    )
+    driver.set_page_load_timeout(60)
+    driver.network_log = network_log
+    if settings["block"]:
+        block_resources(driver)
+    commands.instrument(driver)
+    waits.track_loads(driver)
+    flight_recorder.instrument(driver)
+    return tracing.instrument(driver)
+
+
+def _proc_tree_rss(pid):
+    """Resident memory of a process and its descendants, read from /proc"""
+    children = {}
+    try:
+        entries = [int(entry) for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return None
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The process name may contain spaces; the parent pid follows it
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(entry)
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+        pending.extend(children.get(current, []))
+    return total
+
+
+def browser_rss(driver):
+    """Resident memory in bytes of chromedriver and the Chrome processes it started.
+
+    Returns None when the driver has no local service process or the
+    memory cannot be read on this platform.
+    """
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is None:
+        return None
+    if psutil is None:
+        return _proc_tree_rss(process.pid)
+    try:
+        root = psutil.Process(process.pid)
+        return sum(p.memory_info().rss for p in [root] + root.children(recursive=True))
+    except psutil.Error:
+        return None
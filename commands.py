@@ -0,0 +1,195 @@
+"""WebDriver command counts and latencies per flow.
+
+Every HTTP command a driver sends to chromedriver goes through its
+command executor; instrument() wraps that executor so each command is
+counted and timed, by command type and by the line of test code that
+issued it. Use record() around a flow to collect its numbers:
+
+    with commands.record("assign_issue") as stats:
+        assign_issue(driver)
+    print(stats.count)
+"""
+import bisect
+import copy
+import fnmatch
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+import selenium
+from config import COMMAND_STATS_DIR, COMMAND_BUDGET_TOLERANCE
+
+# Latency bucket upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Flow modules: a command is charged to the innermost of their lines on the
+# stack, however many helper modules (pages, waits, ...) it passed through
+FLOW_FILES = "test_tc*.py"
+
+_SELENIUM_DIR = os.path.dirname(os.path.abspath(selenium.__file__))
+
+
+def caller_line(depth=2):
+    """file:line of the flow-module frame that issued the command.
+
+    Commands sent outside any flow (pool resets, session setup) are
+    charged to the first frame outside Selenium instead.
+    """
+    frame = sys._getframe(depth)
+    fallback = None
+    while frame is not None:
+        filename = os.path.basename(frame.f_code.co_filename)
+        if fnmatch.fnmatch(filename, FLOW_FILES):
+            return f"{filename}:{frame.f_lineno}"
+        if fallback is None and not frame.f_code.co_filename.startswith(_SELENIUM_DIR):
+            fallback = f"{filename}:{frame.f_lineno}"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+class FlowStats:
+    """Command counts, total time and a latency histogram for one flow run"""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.count = 0
+        self.total_ms = 0.0
+        self.commands = {}
+        self.callers = {}
+        self._lock = threading.Lock()
+
+    def add(self, command, caller, elapsed_ms):
+        bucket = bisect.bisect_left(BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            entry = self.commands.setdefault(command, {"count": 0, "total_ms": 0.0,
+                                                       "buckets": [0] * (len(BUCKETS_MS) + 1)})
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["buckets"][bucket] += 1
+            line = self.callers.setdefault(caller, {"count": 0, "total_ms": 0.0, "commands": {}})
+            line["count"] += 1
+            line["total_ms"] += elapsed_ms
+            line["commands"][command] = line["commands"].get(command, 0) + 1
+
+    def to_dict(self):
+        with self._lock:
+            return {"flow": self.flow, "count": self.count, "total_ms": round(self.total_ms, 1),
+                    "commands": copy.deepcopy(self.commands), "callers": copy.deepcopy(self.callers)}
+
+
+_current = None
+
+
+@contextmanager
+def record(flow):
+    """Attribute every command sent inside the block to `flow`"""
+    global _current
+    previous, _current = _current, FlowStats(flow)
+    stats = _current
+    try:
+        yield stats
+    finally:
+        _current = previous
+
+
+def instrument(driver):
+    """Count and time every command this driver sends to chromedriver"""
+    executor = driver.command_executor
+    execute = executor.execute
+
+    def counted_execute(command, params):
+        stats = _current
+        if stats is None:
+            return execute(command, params)
+        start = time.perf_counter()
+        try:
+            return execute(command, params)
+        finally:
+            stats.add(command, caller_line(), (time.perf_counter() - start) * 1000)
+
+    executor.execute = counted_execute
+    return driver
+
+
+def merge(runs):
+    """Combine per-run stats dicts into one histogram per flow.
+
+    Each flow also keeps the command count of its most expensive run,
+    which is what the budget is checked against.
+    """
+    flows = {}
+    for run in runs:
+        flow = flows.setdefault(run["flow"], {"runs": 0, "count": 0, "max_count": 0, "total_ms": 0.0,
+                                              "commands": {}, "callers": {}})
+        flow["runs"] += 1
+        flow["count"] += run["count"]
+        flow["max_count"] = max(flow["max_count"], run["count"])
+        flow["total_ms"] += run["total_ms"]
+        for command, entry in run["commands"].items():
+            merged = flow["commands"].setdefault(command, {"count": 0, "total_ms": 0.0,
+                                                           "buckets": [0] * (len(BUCKETS_MS) + 1)})
+            merged["count"] += entry["count"]
+            merged["total_ms"] += entry["total_ms"]
+            merged["buckets"] = [a + b for a, b in zip(merged["buckets"], entry["buckets"])]
+        for caller, entry in run["callers"].items():
+            merged = flow["callers"].setdefault(caller, {"count": 0, "total_ms": 0.0, "commands": {}})
+            merged["count"] += entry["count"]
+            merged["total_ms"] += entry["total_ms"]
+            for command, count in entry["commands"].items():
+                merged["commands"][command] = merged["commands"].get(command, 0) + count
+    return flows
+
+
+def write_histogram(flows, path=None):
+    path = path or os.path.join(COMMAND_STATS_DIR, f"commands-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"buckets_ms": list(BUCKETS_MS), "flows": flows}, f, indent=2)
+    logging.info(f"Command histogram written to {path}")
+    return path
+
+
+def print_summary(flows, top=3):
+    """Commands per flow, slowest command types and the busiest lines"""
+    for name, flow in flows.items():
+        per_run = flow["count"] / flow["runs"]
+        print(f"{name}: {per_run:.0f} commands/run, {flow['total_ms'] / flow['runs'] / 1000:.1f}s in WebDriver")
+        by_time = sorted(flow["commands"].items(), key=lambda item: -item[1]["total_ms"])
+        for command, entry in by_time[:top]:
+            print(f"    {command:<24} {entry['count']:>5}x {entry['total_ms']:>9.0f} ms")
+        busiest = sorted(flow["callers"].items(), key=lambda item: -item[1]["count"])
+        for caller, entry in busiest[:top]:
+            print(f"    {caller:<24} {entry['count']:>5}x {entry['total_ms']:>9.0f} ms")
+
+
+def read_budget(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_budget(flows, path):
+    """Save each flow's current worst-case command count as its budget"""
+    budget = read_budget(path) or {}
+    budget.update({name: flow["max_count"] for name, flow in flows.items()})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(budget.items())), f, indent=2)
+        f.write("\n")
+    return budget
+
+
+def check_budget(flows, budget, tolerance=COMMAND_BUDGET_TOLERANCE):
+    """Messages for flows whose command count exceeds budget * (1 + tolerance)"""
+    violations = []
+    for name, flow in flows.items():
+        limit = budget.get(name)
+        if limit is not None and flow["max_count"] > limit * (1 + tolerance):
+            violations.append(f"{name}: {flow['max_count']} WebDriver commands, budget {limit}")
+    return violations
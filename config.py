@@ -1,3 +1,101 @@
-BASE_URL = "http://localhost/mantis"
+import os
+
+# "{worker}" in MANTIS_BASE_URL becomes the pytest-xdist worker id ("main" outside
+# xdist), e.g. to give every worker its own stand-in MantisBT (see mantis_standin.py)
+BASE_URL = os.environ.get("MANTIS_BASE_URL", "http://localhost/mantis").rstrip("/").replace(
+    "{worker}", os.environ.get("PYTEST_XDIST_WORKER", "main"))
 USERNAME = "administrator"
 PASSWORD = "mantis123"   # or your changed password
+
+# Parallel runner settings
+WORKERS = os.cpu_count() or 1
+HEADLESS = None   # None lets the browser profile decide
+
+# Browser profile (see browser.PROFILES): lean (headless, blocked resources),
+# full (headless, everything loads) or debug (visible window)
+BROWSER_PROFILE = os.environ.get("MANTIS_BROWSER", "lean")
+# Resources the checks never look at; CSS and scripts still load so that
+# visibility checks and MantisBT's dynamic forms keep working
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+]
+# Chrome's performance log with CDP Network events, read by waits.network_idle.
+# Off by default: it costs CDP traffic on every request, and network_idle falls
+# back to Resource Timing without it
+NETWORK_LOG = os.environ.get("MANTIS_NETWORK_LOG") == "1"
+
+# Warm browser pool (per runner worker)
+DRIVER_POOL_SIZE = 1
+DRIVER_MAX_USES = 20   # recycle a browser after this many flows
+DRIVER_ACQUIRE_TIMEOUT = 300  # seconds to wait for a free browser before giving up
+
+# Screenshots are encoded and written in the background
+SCREENSHOT_DIR = "screenshots"
+SCREENSHOT_FORMAT = "webp"      # png, webp or jpeg (lossy formats need Pillow)
+SCREENSHOT_QUALITY = 80
+SCREENSHOT_MAX_WIDTH = 1280     # downscale wider frames; None keeps full size
+SCREENSHOT_BUDGET_MB = 200      # per run; None for no limit
+SCREENSHOT_WORKERS = 2
+# off, failure-only, keyframes or full; CI can set MANTIS_SCREENSHOTS=off and
+# rely on the flight recorder's failure screenshots
+SCREENSHOT_POLICY = os.environ.get("MANTIS_SCREENSHOTS", "full")
+
+# chromedriver resolution (see driver_resolver.py)
+CHROME_BINARY = os.environ.get("CHROME_BINARY")           # autodetected when unset
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")   # skip resolution entirely
+CHROMEDRIVER_LOCK = "chromedriver.lock.json"
+DRIVER_OFFLINE = os.environ.get("MANTIS_OFFLINE") == "1"  # never download a driver
+
+# HTTP fixture setup (see mantis_client.py)
+MANTIS_API_TOKEN = os.environ.get("MANTIS_API_TOKEN")  # use the REST API when set
+FIXTURE_PROJECT = "MantisBT project"                   # project fixture issues go to
+FIXTURE_DB = "fixtures.sqlite3"                        # shared record of created projects/issues
+FIXTURE_CLAIM_TIMEOUT = 15 * 60                        # seconds before a crashed worker's claim expires
+
+# Step tracing in Chrome trace-event format (see tracing.py)
+TRACE = os.environ.get("MANTIS_TRACE") == "1"
+TRACE_DIR = "traces"
+
+# WebDriver command counts per flow (see commands.py)
+COMMAND_STATS_DIR = "command_stats"
+COMMAND_BUDGET = "command_budget.json"   # {flow: max commands per run}
+COMMAND_BUDGET_TOLERANCE = 0.10          # allowed growth before a flow fails its budget
+
+# Which fallback locator matched, per page and MantisBT version (see locator_stats.py)
+LOCATOR_STATS_DB = "locator_stats.sqlite3"       # None turns the reordering off
+MANTIS_VERSION = os.environ.get("MANTIS_VERSION")  # asked from the server when unset
+
+# In-memory MantisBT stand-in (see mantis_standin.py)
+STANDIN_HOST = "127.0.0.1"
+STANDIN_PORT = 8089
+
+# Flow latency/throughput benchmarks (see benchmark.py)
+BENCHMARK_DIR = "benchmarks"
+BENCHMARK_BASELINE = "benchmark_baseline.json"
+BENCHMARK_ITERATIONS = 5        # runs of each flow
+BENCHMARK_TOLERANCE = 0.20      # allowed slowdown (p95, throughput, browser RSS) against the baseline
+
+# Result logs (see result_log.py): JSON lines for tools, plain text for people
+RESULT_LOG = "test_results.jsonl"
+LOG_FILE = "test_results.log"
+LOG_MAX_BYTES = 10 * 2**20      # rotate a log once it would grow past this
+LOG_BACKUPS = 5                 # rotated files kept as <log>.1 ... <log>.5
+
+# Paginated HTML report (see report.py)
+REPORT_DIR = "report"
+REPORT_CHUNK_SIZE = 500         # log entries per data file / report page
+REPORT_THUMB_WIDTH = 240        # screenshot thumbnails, in pixels (needs Pillow)
+
+# Flight recorder (see flight_recorder.py): the last steps of each browser,
+# written to FAILURE_DIR only when a step fails
+FLIGHT_RECORDER = os.environ.get("MANTIS_RECORDER", "1") != "0"
+FLIGHT_RECORDER_STEPS = 10      # steps kept per browser
+FLIGHT_RECORDER_EVENTS = 300    # CDP network events kept per browser (needs NETWORK_LOG)
+# Hash the whole DOM at every step; off, each step only notes cheap markers
+# (element count, readyState)
+FLIGHT_RECORDER_DOM_DIGEST = os.environ.get("MANTIS_RECORDER_DIGEST") == "1"
+FAILURE_DIR = "failures"
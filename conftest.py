@@ -0,0 +1,169 @@
+import pytest
+import commands
+import flight_recorder
+import locator_stats
+import report
+import result_log
+import screenshots
+import session_cache
+import test_tc01_login
+import waits
+from config import BASE_URL, BROWSER_PROFILE, HEADLESS, SCREENSHOT_POLICY, REPORT_DIR
+from screenshots import POLICIES
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("mantis")
+    group.addoption("--headed", action="store_true",
+                    help="show the browser windows")
+    group.addoption("--browser", default=BROWSER_PROFILE, choices=("lean", "full", "debug"),
+                    help="browser profile (see browser.PROFILES)")
+    group.addoption("--screenshots", default=SCREENSHOT_POLICY, choices=POLICIES,
+                    help="which steps get a screenshot")
+    group.addoption("--command-budget", metavar="PATH",
+                    help="fail tests that send more WebDriver commands than budgeted")
+    group.addoption("--reset-data", action="store_true",
+                    help="reset the stand-in MantisBT (mantis_standin.py) before every test")
+    group.addoption("--report", nargs="?", const=REPORT_DIR, metavar="DIR",
+                    help=f"write a paginated HTML report of this session (default: {REPORT_DIR}/)")
+
+
+def pytest_configure(config):
+    # Runs in the controller and in every pytest-xdist worker
+    screenshots.set_policy(config.getoption("screenshots"))
+    result_log.setup(force=True)
+    config.report_since = report.now()
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    # Keep each phase's report on the item so fixtures can see the outcome
+    rep = yield
+    setattr(item, f"rep_{rep.when}", rep)
+    # One structured outcome per test: its call, or the setup that kept it from running
+    if rep.when == "call" or (rep.when == "setup" and rep.failed):
+        driver = item.funcargs.get("driver")
+        # Read where a failure happened; passing tests skip the round-trip
+        url = waits.landed_url(driver) if rep.failed and driver is not None else None
+        result_log.result(item.name, not rep.failed, rep.longreprtext.strip().split("\n")[-1],
+                          duration=rep.duration, url=url)
+    # Runs before fixture teardown hands the browser back to the pool
+    if rep.when == "call" and rep.failed and "driver" in item.funcargs:
+        flight_recorder.dump(item.funcargs["driver"], item.name,
+                             reason=rep.longreprtext.strip().split("\n")[-1])
+    return rep
+
+
+# Command stats of every test run in this process
+_command_runs = []
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    if "driver" not in item.fixturenames:
+        return (yield)  # unit tests send no WebDriver commands
+    # Count only the test body; fixtures (browser launch, login) are excluded
+    flow = item.name[len("test_"):] if item.name.startswith("test_") else item.name
+    with commands.record(flow) as stats:
+        result = yield
+    _command_runs.append(stats.to_dict())
+
+    budget_path = item.config.getoption("command_budget")
+    budget = commands.read_budget(budget_path) if budget_path else None
+    if budget:
+        violations = commands.check_budget(commands.merge([stats.to_dict()]), budget)
+        if violations:
+            pytest.fail(f"Command budget exceeded - {violations[0]}")
+    return result
+
+
+def pytest_sessionfinish(session):
+    locator_stats.flush()
+    if _command_runs:
+        commands.write_histogram(commands.merge(_command_runs))
+    # xdist workers log to the shared result log; the controller builds the report from it
+    report_dir = session.config.getoption("report")
+    if report_dir and not hasattr(session.config, "workerinput"):
+        result_log.flush()
+        report.build(report_dir, since=session.config.report_since)
+
+
+@pytest.fixture(scope="session")
+def driver_pool(request):
+    """Warm browsers of this worker; every xdist worker gets its own pool"""
+    from driver_pool import DriverPool
+    pool = DriverPool(headless=False if request.config.getoption("headed") else HEADLESS,
+                      profile=request.config.getoption("browser"))
+    yield pool
+    pool.close()
+    screenshots.flush()
+
+
+@pytest.fixture
+def driver(request, driver_pool):
+    """A clean browser (no cookies or storage) borrowed from the pool"""
+    driver = driver_pool.acquire()
+    yield driver
+    # pytest never raises the test's error in here, so judge the browser by
+    # the outcome: anything but a pass gets checked before it goes back
+    rep = getattr(request.node, "rep_call", None)
+    broken = not (rep and rep.passed) and not driver_pool.is_alive(driver)
+    driver_pool.release(driver, broken=broken)
+
+
+@pytest.fixture
+def logged_in_driver(request, driver):
+    """A browser logged in through the test module's own login() helper.
+
+    The session is captured on the worker's first login and injected into
+    later browsers, so the UI login only runs again when it expires.
+    """
+    login = getattr(request.module, "login", test_tc01_login.login)
+    if not session_cache.ensure_logged_in(driver, login):
+        pytest.fail("Login failed")
+    return driver
+
+
+@pytest.fixture(scope="session")
+def fixture_store():
+    from fixture_store import FixtureStore
+    return FixtureStore()
+
+
+@pytest.fixture(scope="session")
+def mantis_client():
+    from mantis_client import MantisClient
+    return MantisClient()
+
+
+@pytest.fixture(autouse=True)
+def reset_data(request):
+    """With --reset-data, every test starts from the stand-in's seed data"""
+    if request.config.getoption("reset_data"):
+        import mantis_standin
+        mantis_standin.reset(BASE_URL)
+        request.getfixturevalue("fixture_store").clear()
+
+
+@pytest.fixture
+def issue_id(request, fixture_store, mantis_client):
+    """An issue claimed for this test alone, or None when none can be set up.
+
+    Mark the test with @pytest.mark.leaves_issue("<state>") to release
+    the issue in that state when the test passes.
+    """
+    from fixture_store import claim_issue
+    try:
+        claimed = claim_issue(fixture_store, mantis_client)
+    except Exception as e:
+        # The flows fall back to the first issue on View Issues
+        print(f"⚠ Could not claim an issue: {str(e)}")
+        yield None
+        return
+
+    yield claimed
+
+    marker = request.node.get_closest_marker("leaves_issue")
+    rep = getattr(request.node, "rep_call", None)
+    state = marker.args[0] if marker and rep and rep.passed else None
+    fixture_store.release("issue", claimed, state=state)
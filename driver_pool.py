@@ -0,0 +1,155 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import HTTPError
+import flight_recorder
+import tracing
+from browser import create_driver, drain_performance_log
+from config import DRIVER_POOL_SIZE, DRIVER_MAX_USES, DRIVER_ACQUIRE_TIMEOUT, HEADLESS, BROWSER_PROFILE
+
+# What a dead chromedriver raises: it answers with an error, or not at all
+DRIVER_ERRORS = (WebDriverException, HTTPError, ConnectionError)
+
+
+class DriverPool:
+    """Keeps warm Chrome sessions and hands them out one flow at a time.
+
+    Browsers are reset between uses (cookies, storage, about:blank) and
+    replaced after `max_uses` flows or as soon as they stop responding.
+    A browser that cannot be relaunched leaves an empty slot (None in the
+    idle queue), which the next acquire() tries to fill again.
+    """
+
+    def __init__(self, size=DRIVER_POOL_SIZE, max_uses=DRIVER_MAX_USES, headless=HEADLESS,
+                 profile=BROWSER_PROFILE):
+        self.size = size
+        self.max_uses = max_uses
+        self.headless = headless
+        self.profile = profile
+        self._idle = queue.Queue()
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Launch all browsers at once; Chrome startup is mostly waiting
+        with ThreadPoolExecutor(max_workers=size) as launcher:
+            for driver in launcher.map(lambda _: self._launch(), range(size)):
+                self._idle.put(driver)
+
+    def _launch(self):
+        driver = create_driver(headless=self.headless, profile=self.profile)
+        with self._lock:
+            self._uses[id(driver)] = 0
+        logging.info(f"Driver pool: launched browser {driver.session_id}")
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @tracing.traced("reset_browser", cat="browser")
+    def reset(self, driver):
+        """Return a used browser to a blank, logged-out state"""
+        try:
+            # Storage is per origin, so clear it before leaving the page
+            driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+        except WebDriverException:
+            pass
+
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except (WebDriverException, AttributeError):
+            driver.delete_all_cookies()
+
+        driver.get("about:blank")
+        # Nothing reads the log between flows; drop what this one left behind,
+        # then forget the flow's steps (the drain copies events into them)
+        drain_performance_log(driver)
+        flight_recorder.clear(driver)
+
+    def acquire(self, timeout=DRIVER_ACQUIRE_TIMEOUT):
+        """Take an idle browser, blocking up to `timeout` seconds until one is free"""
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        try:
+            driver = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No browser became free within {timeout}s") from None
+        if driver is None:
+            try:
+                driver = self._launch()
+            except Exception:
+                self._idle.put(None)  # keep the slot for the next try
+                raise
+        return driver
+
+    def release(self, driver, broken=False):
+        """Hand a browser back, recycling it if it is worn out or crashed"""
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+
+        if self._closed:
+            self._discard(driver)
+            return
+
+        if not broken and uses < self.max_uses:
+            try:
+                self.reset(driver)
+                self._idle.put(driver)
+                return
+            except DRIVER_ERRORS as e:
+                logging.warning(f"Driver pool: reset failed, recycling browser: {str(e)}")
+        else:
+            reason = "crashed" if broken else f"reached {uses} uses"
+            logging.info(f"Driver pool: recycling browser ({reason})")
+
+        self._discard(driver)
+        try:
+            replacement = self._launch()
+        except Exception as e:
+            # Runs after the flow (session()'s finally, the driver fixture): never mask its error
+            logging.error(f"Driver pool: could not relaunch browser, retrying on next use: {str(e)}")
+            replacement = None
+        self._idle.put(replacement)
+
+    @contextmanager
+    def session(self):
+        """Borrow a browser for the duration of a `with` block"""
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except DRIVER_ERRORS:
+            broken = not self.is_alive(driver)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    @staticmethod
+    def is_alive(driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except DRIVER_ERRORS:
+            return False
+
+    def close(self):
+        """Quit every idle browser; browsers still in use quit on release"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                self._discard(driver)
@@ -0,0 +1,143 @@
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+from config import CHROME_BINARY, CHROMEDRIVER_PATH, CHROMEDRIVER_LOCK, DRIVER_OFFLINE
+
+DRIVER_NAME = "chromedriver.exe" if sys.platform == "win32" else "chromedriver"
+
+# Where webdriver-manager and Selenium Manager keep downloaded drivers
+DRIVER_CACHES = [
+    os.path.join(os.path.expanduser("~"), ".wdm", "drivers", "chromedriver"),
+    os.path.join(os.path.expanduser("~"), ".cache", "selenium", "chromedriver"),
+]
+
+VERSION_RE = re.compile(r"(\d+\.\d+\.\d+\.\d+)")
+
+
+def find_chrome():
+    """Path of the installed Chrome binary, or None"""
+    if CHROME_BINARY:
+        return CHROME_BINARY
+
+    if sys.platform == "win32":
+        candidates = [
+            os.path.join(os.environ.get(var, ""), "Google", "Chrome", "Application", "chrome.exe")
+            for var in ("PROGRAMFILES", "PROGRAMFILES(X86)", "LOCALAPPDATA")
+        ]
+    elif sys.platform == "darwin":
+        candidates = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+    else:
+        candidates = [shutil.which(name) or "" for name in
+                      ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")]
+
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def chrome_version(binary):
+    """Full version string of a Chrome binary, e.g. 139.0.7258.154"""
+    if sys.platform == "win32":
+        # chrome.exe --version prints nothing on Windows; the install keeps
+        # a directory named after the version next to the executable
+        versions = [name for name in os.listdir(os.path.dirname(binary)) if VERSION_RE.fullmatch(name)]
+        if versions:
+            return max(versions, key=lambda v: [int(part) for part in v.split(".")])
+        return None
+
+    output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+    match = VERSION_RE.search(output)
+    return match.group(1) if match else None
+
+
+def read_lock(path=CHROMEDRIVER_LOCK):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_lock(lock, path=CHROMEDRIVER_LOCK):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2)
+
+
+def find_cached_driver(version):
+    """A chromedriver already on disk for this Chrome version (same major at least)"""
+    major = version.split(".")[0]
+    exact, compatible = [], []
+    for cache in DRIVER_CACHES:
+        pattern = os.path.join(cache, "**", DRIVER_NAME)
+        for path in glob.glob(pattern, recursive=True):
+            match = VERSION_RE.search(path)
+            if not match:
+                continue
+            if match.group(1) == version:
+                exact.append(path)
+            elif match.group(1).split(".")[0] == major:
+                compatible.append((match.group(1), path))
+    if exact:
+        return version, exact[0]
+    if compatible:
+        return max(compatible, key=lambda item: [int(p) for p in item[0].split(".")])
+    return None, None
+
+
+def resolve_driver(offline=DRIVER_OFFLINE, lock_path=CHROMEDRIVER_LOCK):
+    """Path of the chromedriver pinned for the installed Chrome.
+
+    The lockfile is trusted as long as the pinned driver exists and the
+    Chrome binary has not changed since, so the normal path costs one
+    file read and two stat calls. Otherwise the Chrome version is
+    detected, a matching driver is looked up in the local caches and only
+    then, unless `offline`, downloaded through webdriver-manager.
+    """
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+
+    binary = find_chrome()
+    lock = read_lock(lock_path)
+    if (lock and os.path.exists(lock.get("driver_path", ""))
+            and binary == lock.get("chrome_binary")
+            and binary and os.path.getmtime(binary) == lock.get("chrome_mtime")):
+        return lock["driver_path"]
+
+    if not binary:
+        raise RuntimeError("Chrome is not installed; set CHROME_BINARY in config.py")
+
+    version = chrome_version(binary)
+    if not version:
+        raise RuntimeError(f"Could not detect the Chrome version of {binary}")
+
+    driver_version, driver_path = find_cached_driver(version)
+    if not driver_path:
+        if offline:
+            raise RuntimeError(
+                f"No cached chromedriver for Chrome {version} and offline mode is on; "
+                f"put one in {DRIVER_CACHES[0]} or set CHROMEDRIVER_PATH"
+            )
+        from webdriver_manager.chrome import ChromeDriverManager
+        driver_path = ChromeDriverManager(driver_version=version).install()
+        driver_version = version
+
+    write_lock({
+        "chrome_binary": binary,
+        "chrome_mtime": os.path.getmtime(binary),
+        "chrome_version": version,
+        "driver_version": driver_version,
+        "driver_path": driver_path,
+    }, lock_path)
+    logging.info(f"Pinned chromedriver {driver_version} for Chrome {version}: {driver_path}")
+    return driver_path
+
+
+if __name__ == "__main__":
+    # Pin the driver ahead of time, e.g. when preparing an air-gapped agent
+    print(resolve_driver())
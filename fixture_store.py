@@ -0,0 +1,167 @@
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from config import BASE_URL, FIXTURE_DB, FIXTURE_CLAIM_TIMEOUT, FIXTURE_PROJECT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fixtures (
+    server      TEXT NOT NULL,      -- MantisBT base URL the fixture lives on
+    kind        TEXT NOT NULL,      -- 'project' or 'issue'
+    mantis_id   INTEGER NOT NULL,
+    name        TEXT,
+    project_id  INTEGER,
+    state       TEXT NOT NULL,
+    claimed_by  TEXT,
+    claimed_at  REAL,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (server, kind, mantis_id)
+);
+CREATE INDEX IF NOT EXISTS fixtures_free ON fixtures (server, kind, state, claimed_by);
+"""
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class FixtureStore:
+    """Records the projects and issues the suite created, shared by all workers.
+
+    Backed by SQLite in WAL mode, so any number of processes can read while
+    one writes. claim() hands each caller a distinct fixture in a given
+    state; claims left behind by a crashed worker expire after
+    `claim_timeout` seconds.
+    """
+
+    def __init__(self, path=FIXTURE_DB, server=BASE_URL, claim_timeout=FIXTURE_CLAIM_TIMEOUT):
+        self.path = path
+        self.server = server
+        self.claim_timeout = claim_timeout
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front"""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def record(self, kind, mantis_id, state="new", name=None, project_id=None, claim=False):
+        """Add or update a fixture; with claim=True the caller also holds it"""
+        now = time.time()
+        owner = worker_id() if claim else None
+        with self._transaction() as db:
+            db.execute(
+                """INSERT INTO fixtures (server, kind, mantis_id, name, project_id, state,
+                                         claimed_by, claimed_at, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (server, kind, mantis_id) DO UPDATE SET
+                       name = COALESCE(excluded.name, name),
+                       project_id = COALESCE(excluded.project_id, project_id),
+                       state = excluded.state,
+                       claimed_by = excluded.claimed_by,
+                       claimed_at = excluded.claimed_at,
+                       updated_at = excluded.updated_at""",
+                (self.server, kind, int(mantis_id), name, project_id, state, owner, now if claim else None, now, now),
+            )
+
+    def claim(self, kind, state="new", project_id=None):
+        """Take an unclaimed fixture in `state`; returns it as a dict or None"""
+        now = time.time()
+        query = """SELECT * FROM fixtures
+                   WHERE server = ? AND kind = ? AND state = ?
+                     AND (claimed_by IS NULL OR claimed_at < ?)"""
+        params = [self.server, kind, state, now - self.claim_timeout]
+        if project_id is not None:
+            query += " AND project_id = ?"
+            params.append(project_id)
+
+        with self._transaction() as db:
+            row = db.execute(query + " ORDER BY created_at LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                """UPDATE fixtures SET claimed_by = ?, claimed_at = ?
+                   WHERE server = ? AND kind = ? AND mantis_id = ?""",
+                (worker_id(), now, self.server, kind, row["mantis_id"]),
+            )
+        return dict(row)
+
+    def release(self, kind, mantis_id, state=None):
+        """Give a claimed fixture back, optionally moving it to a new state"""
+        with self._transaction() as db:
+            db.execute(
+                """UPDATE fixtures SET claimed_by = NULL, claimed_at = NULL,
+                                       state = COALESCE(?, state), updated_at = ?
+                   WHERE server = ? AND kind = ? AND mantis_id = ?""",
+                (state, time.time(), self.server, kind, int(mantis_id)),
+            )
+
+    def forget(self, kind, mantis_id):
+        """Drop a fixture that no longer exists in MantisBT"""
+        with self._transaction() as db:
+            db.execute("DELETE FROM fixtures WHERE server = ? AND kind = ? AND mantis_id = ?",
+                       (self.server, kind, int(mantis_id)))
+
+    def clear(self):
+        """Forget every fixture of this server, e.g. after its data was reset"""
+        with self._transaction() as db:
+            db.execute("DELETE FROM fixtures WHERE server = ?", (self.server,))
+
+    def find(self, kind, name):
+        """Most recent fixture of a kind with this name, or None"""
+        with self._connect() as db:
+            row = db.execute(
+                """SELECT * FROM fixtures WHERE server = ? AND kind = ? AND name = ?
+                   ORDER BY created_at DESC LIMIT 1""",
+                (self.server, kind, name),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def counts(self):
+        """{(kind, state): number of fixtures}"""
+        with self._connect() as db:
+            rows = db.execute("SELECT kind, state, COUNT(*) FROM fixtures WHERE server = ? "
+                              "GROUP BY kind, state", (self.server,))
+            return {(kind, state): count for kind, state, count in rows}
+
+
+def fixture_project(store, client, name=FIXTURE_PROJECT):
+    """Id of the project fixture issues are reported in, creating it if needed"""
+    project = store.find("project", name)
+    if project:
+        return project["mantis_id"]
+    project_id = client.find_project(name) or client.create_project(name)
+    store.record("project", project_id, state="ready", name=name)
+    return project_id
+
+
+def claim_issue(store, client):
+    """Claim an unused new issue, reporting a fresh one over HTTP if none is left"""
+    issue = store.claim("issue", state="new")
+    if issue:
+        return issue["mantis_id"]
+
+    project_id = fixture_project(store, client)
+    issue_id = client.report_issue(project_id)
+    store.record("issue", issue_id, project_id=project_id, claim=True)
+    return issue_id
@@ -0,0 +1,212 @@
+"""Last-steps context for failures, kept in memory until something fails.
+
+Every browser has a ring buffer of its last FLIGHT_RECORDER_STEPS steps:
+the URL, title, element count and readyState at each step (plus a digest
+of the whole DOM with FLIGHT_RECORDER_DOM_DIGEST), the console messages
+logged since the previous step and, with NETWORK_LOG, its last CDP Network
+events. Recording a step costs one short execute_script; nothing is
+written while steps pass. When a flow fails, dump() writes the buffer with
+a final screenshot and the page source:
+
+    failures/<time>-<test>-<pid>/trace.json
+    failures/<time>-<test>-<pid>/screenshot.png
+    failures/<time>-<test>-<pid>/page.html
+
+Flows record their steps from their take_screenshot() step hook; the
+runner (run_flow) and conftest (a failed test) dump on failure, before the
+browser goes back to the pool.
+"""
+import json
+import logging
+import os
+import re
+import time
+import weakref
+from collections import deque
+from selenium.common.exceptions import WebDriverException
+import tracing
+from config import (FLIGHT_RECORDER, FLIGHT_RECORDER_STEPS, FLIGHT_RECORDER_EVENTS,
+                    FLIGHT_RECORDER_DOM_DIGEST, FAILURE_DIR)
+
+# Installed in every new document: keeps console output and uncaught errors
+# in a bounded array that STEP_JS drains
+CONSOLE_HOOK_JS = """
+(function () {
+    var buffer = window.__mantisConsole = [];
+    function keep(level, args) {
+        if (buffer.length >= 100) buffer.shift();
+        buffer.push({level: level, time: Date.now(),
+                     text: Array.prototype.map.call(args, function (a) {
+                         try { return typeof a === 'string' ? a : JSON.stringify(a); } catch (e) { return String(a); }
+                     }).join(' ').slice(0, 1000)});
+    }
+    ['log', 'info', 'warn', 'error', 'debug'].forEach(function (level) {
+        var original = console[level];
+        console[level] = function () { keep(level, arguments); return original.apply(console, arguments); };
+    });
+    window.addEventListener('error', function (e) { keep('exception', [e.message + ' (' + e.filename + ':' + e.lineno + ')']); });
+    window.addEventListener('unhandledrejection', function (e) { keep('exception', ['Unhandled rejection: ' + e.reason]); });
+})();
+"""
+
+# URL, title, cheap DOM markers and the console output since the last step;
+# with arguments[0] also an FNV-1a digest of the serialized DOM
+STEP_JS = """
+var step = {url: location.href, title: document.title, ready_state: document.readyState,
+            elements: document.getElementsByTagName('*').length,
+            console: window.__mantisConsole || []};
+window.__mantisConsole = [];
+if (arguments[0] && document.documentElement) {
+    var html = document.documentElement.outerHTML, hash = 0x811c9dc5;
+    for (var i = 0; i < html.length; i++) {
+        hash ^= html.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193) >>> 0;
+    }
+    step.dom_digest = ('0000000' + hash.toString(16)).slice(-8);
+    step.dom_length = html.length;
+}
+return step;
+"""
+
+NETWORK_EVENTS = ("Network.requestWillBeSent", "Network.responseReceived",
+                  "Network.loadingFinished", "Network.loadingFailed")
+
+
+class Recording:
+    """One browser's ring buffers"""
+
+    def __init__(self, steps=FLIGHT_RECORDER_STEPS, events=FLIGHT_RECORDER_EVENTS):
+        self.steps = deque(maxlen=steps)
+        self.network = deque(maxlen=events)
+        # Set once a failure is written, until the next step
+        self.dumped = False
+
+    def add_performance_entries(self, entries):
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            if message.get("method") in NETWORK_EVENTS:
+                self.network.append(network_event(entry.get("timestamp"), message))
+
+    def clear(self):
+        self.steps.clear()
+        self.network.clear()
+        self.dumped = False
+
+
+def network_event(timestamp, message):
+    """The parts of a CDP Network event worth keeping"""
+    params = message.get("params", {})
+    event = {"time": timestamp, "method": message["method"], "request": params.get("requestId")}
+    if "request" in params:
+        event["url"] = params["request"].get("url")
+        event["http_method"] = params["request"].get("method")
+    if "response" in params:
+        event["url"] = params["response"].get("url")
+        event["status"] = params["response"].get("status")
+        event["mime_type"] = params["response"].get("mimeType")
+    if "errorText" in params:
+        event["error"] = params["errorText"]
+        if params.get("blockedReason"):
+            event["blocked"] = params["blockedReason"]
+    return event
+
+
+_recordings = weakref.WeakKeyDictionary()
+
+
+def instrument(driver):
+    """Start recording this driver: console hook and a copy of its Network events"""
+    if not FLIGHT_RECORDER:
+        return driver
+    recording = _recordings[driver] = Recording()
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": CONSOLE_HOOK_JS})
+    except (WebDriverException, AttributeError):
+        pass  # no CDP: steps are recorded without console output
+
+    # The performance log (NETWORK_LOG) is drained by whoever reads it
+    # (waits.network_idle, the pool's reset too), so keep a copy of every read
+    get_log = driver.get_log
+
+    def recorded_get_log(log_type):
+        entries = get_log(log_type)
+        if log_type == "performance":
+            recording.add_performance_entries(entries)
+        return entries
+
+    driver.get_log = recorded_get_log
+    return driver
+
+
+def record(driver, test_name, step_name, dom_digest=FLIGHT_RECORDER_DOM_DIGEST):
+    """Add a step to the driver's ring buffer"""
+    recording = _recordings.get(driver)
+    if recording is None:
+        return
+    step = {"time": time.time(), "test": test_name, "step": step_name}
+    try:
+        with tracing.step("record_step", "recorder"):
+            step.update(driver.execute_script(STEP_JS, dom_digest) or {})
+    except Exception as e:
+        # Runs from the flows' except blocks too: a dead chromedriver's
+        # urllib3 error must not replace the flow's own
+        step["error"] = (str(e).splitlines() or [type(e).__name__])[0]
+    recording.steps.append(step)
+    recording.dumped = False
+
+
+def clear(driver):
+    """Forget a driver's steps, e.g. before the browser is reused for another flow"""
+    recording = _recordings.get(driver)
+    if recording is not None:
+        recording.clear()
+
+
+def dump(driver, test_name, reason="", folder=FAILURE_DIR):
+    """Write the driver's recent steps, network events, a screenshot and the page source.
+
+    Returns the failure folder, or None when recording is off or this
+    failure was already written (no step since the last dump).
+    """
+    recording = _recordings.get(driver)
+    if recording is None or recording.dumped:
+        return None
+
+    name = re.sub(r"[^\w.-]+", "_", test_name)
+    path = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{os.getpid()}")
+    trace = {"test": test_name, "reason": reason, "time": time.time(), "url": None}
+
+    # Best effort throughout: the caller is handling a failure already, and
+    # a dead chromedriver raises urllib3 errors rather than WebDriverException
+    try:
+        os.makedirs(path, exist_ok=True)
+        with tracing.step("dump_failure", "recorder", test=test_name):
+            if getattr(driver, "network_log", False):
+                try:
+                    driver.get_log("performance")  # events not read yet; recorded_get_log keeps them
+                except Exception:
+                    pass
+            try:
+                trace["url"] = driver.current_url
+                with open(os.path.join(path, "page.html"), "w", encoding="utf-8") as f:
+                    f.write(driver.page_source)
+                driver.save_screenshot(os.path.join(path, "screenshot.png"))
+            except Exception as e:
+                trace["capture_error"] = (str(e).splitlines() or [type(e).__name__])[0]
+
+        trace["steps"] = list(recording.steps)
+        trace["network"] = list(recording.network)
+        with open(os.path.join(path, "trace.json"), "w", encoding="utf-8") as f:
+            json.dump(trace, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        logging.warning(f"Could not write the failure trace for {test_name}: {str(e)}")
+        return None
+
+    recording.clear()
+    recording.dumped = True
+    logging.error(f"Failure trace for {test_name} written to {path}")
+    print(f"🧾 Failure trace: {path}")
+    return path
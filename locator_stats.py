@@ -0,0 +1,194 @@
+"""Remembers which fallback locator matched, per page and MantisBT version.
+
+Page objects list several candidates per element, most of which are only
+there for other MantisBT versions. LocatorStats counts, for every
+candidate, how often it matched (hits) and how often it was tried without
+matching (misses). order() puts the candidate with the most hits first, so
+find_first usually stops at the first selector. Misses are logged, and
+
+    python locator_stats.py
+
+lists the candidates that never matched so dead fallbacks can be pruned.
+"""
+import atexit
+import logging
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from config import LOCATOR_STATS_DB, MANTIS_VERSION
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locator_stats (
+    version     TEXT NOT NULL,      -- MantisBT version the counts were taken on
+    page        TEXT NOT NULL,      -- page object class, e.g. BugViewPage
+    locator     TEXT NOT NULL,      -- named locator on that page, e.g. handler
+    selector    TEXT NOT NULL,      -- "<by>=<value>"
+    hits        INTEGER NOT NULL DEFAULT 0,
+    misses      INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (version, page, locator, selector)
+);
+"""
+
+
+def selector_key(selector):
+    by, value = selector
+    return f"{by}={value}"
+
+
+def mantis_version():
+    """Version of the MantisBT under test; MANTIS_VERSION wins over asking the server"""
+    if MANTIS_VERSION:
+        return MANTIS_VERSION
+    try:
+        from mantis_client import MantisClient
+        return MantisClient(timeout=5).version() or "unknown"
+    except Exception as e:
+        logging.warning(f"Could not read the MantisBT version: {str(e)}")
+        return "unknown"
+
+
+class LocatorStats:
+    """Hit/miss counts of locator candidates, shared by all workers.
+
+    Counts are kept in memory and written to SQLite (WAL, like the fixture
+    store) by flush(), so a lookup never waits on the disk.
+    """
+
+    def __init__(self, path=LOCATOR_STATS_DB, version=None):
+        self.path = path
+        self._version = version
+        self._hits = None      # {(page, locator): {selector: hits}} for this version
+        self._pending = {}     # {(page, locator, selector): [hits, misses]} not yet written
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = mantis_version()
+        return self._version
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        try:
+            db.executescript(SCHEMA)
+            yield db
+        finally:
+            db.close()
+
+    def _load(self):
+        if self._hits is None:
+            self._hits = {}
+            try:
+                with self._connect() as db:
+                    rows = db.execute("SELECT page, locator, selector, hits FROM locator_stats "
+                                      "WHERE version = ?", (self.version,)).fetchall()
+            except sqlite3.Error as e:
+                logging.warning(f"Locator stats unavailable: {str(e)}")
+                rows = []
+            for page, locator, selector, hits in rows:
+                self._hits.setdefault((page, locator), {})[selector] = hits
+        return self._hits
+
+    def order(self, page, locator, candidates):
+        """Candidates with the historical winner first; ties keep their listed order"""
+        hits = self._load().get((page, locator))
+        if not hits:
+            return list(candidates)
+        return sorted(candidates, key=lambda selector: -hits.get(selector_key(selector), 0))
+
+    def record(self, page, locator, candidates, matched):
+        """Count the outcome of a find_first over `candidates` (tried in that order)"""
+        hits = self._load().setdefault((page, locator), {})
+        for selector in candidates:
+            self._pending.setdefault((page, locator, selector_key(selector)), [0, 0])
+        for selector in candidates:
+            counts = self._pending[(page, locator, selector_key(selector))]
+            if selector == matched:
+                counts[0] += 1
+                hits[selector_key(selector)] = hits.get(selector_key(selector), 0) + 1
+                return
+            counts[1] += 1
+            logging.info(f"Locator miss: {page}.{locator} {selector_key(selector)}")
+        logging.info(f"Locator miss: {page}.{locator} matched none of {len(candidates)} candidates")
+
+    def flush(self):
+        """Write the counts gathered since the last flush"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        now = time.time()
+        try:
+            with self._connect() as db:
+                db.execute("BEGIN IMMEDIATE")
+                db.executemany(
+                    """INSERT INTO locator_stats (version, page, locator, selector, hits, misses, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (version, page, locator, selector) DO UPDATE SET
+                           hits = hits + excluded.hits,
+                           misses = misses + excluded.misses,
+                           updated_at = excluded.updated_at""",
+                    [(self.version, page, locator, selector, hits, misses, now)
+                     for (page, locator, selector), (hits, misses) in pending.items()])
+                db.execute("COMMIT")
+        except sqlite3.Error as e:
+            logging.warning(f"Could not save locator stats: {str(e)}")
+
+    def rows(self, version=None):
+        """Stored counts as dicts, for one version or all of them"""
+        query = "SELECT version, page, locator, selector, hits, misses FROM locator_stats"
+        params = ()
+        if version:
+            query += " WHERE version = ?"
+            params = (version,)
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute(query + " ORDER BY version, page, locator, hits DESC", params).fetchall()
+        return [dict(row) for row in rows]
+
+
+_stats = None
+
+
+def get_stats():
+    global _stats
+    if _stats is None:
+        _stats = LocatorStats()
+    return _stats
+
+
+def order(page, locator, candidates):
+    if LOCATOR_STATS_DB is None:
+        return list(candidates)
+    return get_stats().order(page, locator, candidates)
+
+
+def record(page, locator, candidates, matched):
+    if LOCATOR_STATS_DB is not None:
+        get_stats().record(page, locator, candidates, matched)
+
+
+def flush():
+    if _stats is not None:
+        _stats.flush()
+
+
+# Standalone scripts; runner workers and pytest flush explicitly
+atexit.register(flush)
+
+
+def print_report(version=None):
+    """Counts per locator; candidates that never matched are marked for pruning"""
+    current = None
+    for row in LocatorStats().rows(version):
+        if (row["version"], row["page"], row["locator"]) != current:
+            current = (row["version"], row["page"], row["locator"])
+            print(f"\n{row['page']}.{row['locator']} (MantisBT {row['version']})")
+        mark = "  ✗ never matched" if not row["hits"] else ""
+        print(f"  {row['hits']:6d} hits {row['misses']:6d} misses  {row['selector']}{mark}")
+
+
+if __name__ == "__main__":
+    print_report(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+from selenium.webdriver.common.by import By
+import tracing
+
+# Shared by the scripts below: query(by, value) resolves a Selenium locator
+# in the page and usable(el) filters out hidden or disabled elements.
+QUERY_JS = """
+function usable(el) {
+    if (!displayedOnly) return true;
+    return !el.disabled && el.getClientRects().length > 0;
+}
+
+function query(by, value) {
+    if (by === 'css selector') return Array.from(document.querySelectorAll(value));
+    if (by === 'tag name') return Array.from(document.getElementsByTagName(value));
+    if (by === 'xpath') {
+        var snapshot = document.evaluate(value, document, null,
+                                         XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var nodes = [];
+        for (var i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+        return nodes;
+    }
+    if (by === 'link text' || by === 'partial link text') {
+        return Array.from(document.getElementsByTagName('a')).filter(function (a) {
+            var text = a.innerText.trim();
+            return by === 'link text' ? text === value : text.indexOf(value) !== -1;
+        });
+    }
+    return [];
+}
+"""
+
+# Evaluates every candidate selector in the page in a single round-trip
+# and returns [index, element] for the first one that matches.
+FIND_FIRST_JS = """
+var selectors = arguments[0], displayedOnly = arguments[1];
+""" + QUERY_JS + """
+for (var i = 0; i < selectors.length; i++) {
+    var matches = query(selectors[i][0], selectors[i][1]).filter(usable);
+    if (matches.length) return [i, matches[0]];
+}
+return null;
+"""
+
+
+def _to_query(selector):
+    """Translate NAME/ID/CLASS locators into CSS so the page can evaluate them"""
+    by, value = selector
+    if by == By.NAME:
+        return [By.CSS_SELECTOR, f'[name="{value}"]']
+    if by == By.ID:
+        return [By.CSS_SELECTOR, f'[id="{value}"]']
+    if by == By.CLASS_NAME:
+        return [By.CSS_SELECTOR, f".{value}"]
+    return [by, value]
+
+
+def find_first(driver, selectors, displayed=False):
+    """Return (element, selector) for the first selector that matches anything.
+
+    All candidates are tried in one execute_script call, so a miss costs
+    nothing instead of a full implicit wait. With `displayed=True` only
+    visible, enabled elements count. Returns (None, None) when nothing matches.
+    """
+    with tracing.step("find_first", "locate", candidates=len(selectors)) as span:
+        result = driver.execute_script(FIND_FIRST_JS, [_to_query(s) for s in selectors], displayed)
+        span["matched"] = result[0] if result else None
+    if not result:
+        return None, None
+    index, element = result
+    return element, selectors[index]
+
+
+# Text and attributes of every element matching one locator, in one round-trip.
+# Attributes are read as properties first, like WebElement.get_attribute().
+QUERY_ALL_JS = """
+var selector = arguments[0], attributes = arguments[1], displayedOnly = arguments[2],
+    withElements = arguments[3];
+""" + QUERY_JS + """
+return query(selector[0], selector[1]).filter(usable).map(function (el) {
+    var item = {text: (el.tagName === 'OPTION' ? el.text : el.innerText || '').trim()};
+    attributes.forEach(function (name) {
+        var value = name in el ? el[name] : el.getAttribute(name);
+        item[name] = value === undefined ? null : value;
+    });
+    if (withElements) item.element = el;
+    return item;
+});
+"""
+
+OPTIONS_JS = """
+return Array.from(arguments[0].options).map(function (option) {
+    return {text: option.text.trim(), value: option.value, index: option.index,
+            selected: option.selected, disabled: option.disabled};
+});
+"""
+
+
+def query_all(driver, selector, attributes=(), displayed=False, elements=False):
+    """Text and attributes of every element matching `selector` in one call.
+
+    Returns a list of dicts with "text" plus one key per attribute, and
+    with `elements=True` the WebElement itself under "element" (for a
+    later click). Replaces loops reading .text / get_attribute() per element.
+    """
+    with tracing.step("query_all", "locate", selector=selector[1]) as span:
+        items = driver.execute_script(QUERY_ALL_JS, _to_query(selector), list(attributes),
+                                      displayed, elements)
+        span["matches"] = len(items)
+    return items
+
+
+def select_options(driver, select):
+    """text/value/index/selected of every option of a <select> in one call.
+
+    `select` is the <select> WebElement or a Select wrapping it.
+    """
+    element = getattr(select, "_el", select)
+    return driver.execute_script(OPTIONS_JS, element)
+
+
+@contextmanager
+def no_implicit_wait(driver):
+    """Make find_element(s) calls inside the block fail fast"""
+    previous = driver.timeouts.implicit_wait
+    driver.implicitly_wait(0)
+    try:
+        yield
+    finally:
+        driver.implicitly_wait(previous)
@@ -0,0 +1,228 @@
+import html
+import logging
+import re
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config import BASE_URL, USERNAME, PASSWORD, MANTIS_API_TOKEN
+
+# MantisBT enum values used by the report form and the REST API
+STATUS = {"new": 10, "feedback": 20, "acknowledged": 30, "confirmed": 40,
+          "assigned": 50, "resolved": 80, "closed": 90}
+SEVERITY = {"feature": 10, "trivial": 20, "text": 30, "tweak": 40, "minor": 50,
+            "major": 60, "crash": 70, "block": 80}
+PRIORITY = {"none": 10, "low": 20, "normal": 30, "high": 40, "urgent": 50, "immediate": 60}
+REPRODUCIBILITY = {"always": 10, "sometimes": 30, "random": 50, "have not tried": 70,
+                   "unable to reproduce": 90, "N/A": 100}
+
+
+class MantisError(Exception):
+    pass
+
+
+class MantisClient:
+    """Talks to MantisBT over HTTP for test data setup, without a browser.
+
+    Uses the REST API when an API token is configured and the regular
+    HTML forms (with their CSRF tokens) otherwise. One keep-alive
+    connection pool is shared by every call.
+    """
+
+    def __init__(self, base_url=BASE_URL, username=USERNAME, password=PASSWORD,
+                 api_token=MANTIS_API_TOKEN, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.api_token = api_token
+        self.timeout = timeout
+        self.logged_in = False
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if api_token:
+            self.session.headers["Authorization"] = api_token
+
+    def url(self, page):
+        return f"{self.base_url}/{page}"
+
+    def _get(self, page, **params):
+        response = self.session.get(self.url(page), params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def _post(self, page, data):
+        response = self.session.post(self.url(page), data=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def _rest(self, method, path, **kwargs):
+        response = self.session.request(method, self.url(f"api/rest/{path}"),
+                                        timeout=self.timeout, **kwargs)
+        if response.status_code >= 400:
+            raise MantisError(f"REST {method} {path} failed: {response.status_code} {response.text[:200]}")
+        return response.json() if response.content else {}
+
+    @staticmethod
+    def _form_token(page_html, form):
+        match = re.search(rf'name="{form}_token"\s+value="([^"]+)"', page_html)
+        if not match:
+            raise MantisError(f"No {form} security token on the page")
+        return match.group(1)
+
+    @staticmethod
+    def _submitted_issue_id(response):
+        """Id of a just reported issue: the page redirected to, or the success banner's link.
+
+        Only the banner counts; the navbar and "recently visited" link other issues.
+        """
+        match = re.search(r"view\.php\?id=(\d+)", response.url)
+        if not match:
+            banner = re.search(r'class="[^"]*alert-success[^"]*"(.*?)</div>\s*</div>', response.text, re.S)
+            match = banner and re.search(r'href="[^"]*view\.php\?id=(\d+)"', banner.group(1))
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _error(page_html):
+        match = re.search(r'class="[^"]*alert-danger[^"]*"[^>]*>(.*?)</div>', page_html, re.S)
+        return re.sub(r"<[^>]+>|\s+", " ", match.group(1)).strip() if match else None
+
+    def login(self):
+        """Log the HTTP session in; returns the session cookies"""
+        if self.api_token:
+            self.logged_in = True
+            return {}
+
+        response = self._post("login.php", {"username": self.username, "password": self.password,
+                                            "return": "my_view_page.php"})
+        if "login_page.php" in response.url or "MANTIS_STRING_COOKIE" not in self.session.cookies:
+            raise MantisError(f"Login failed for {self.username}")
+        self.logged_in = True
+        logging.info(f"Mantis client: logged in as {self.username}")
+        return self.session.cookies.get_dict()
+
+    def _ensure_login(self):
+        if not self.logged_in:
+            self.login()
+
+    def version(self):
+        """MantisBT version from the REST API's X-Mantis-Version header, or None"""
+        response = self.session.get(self.url("api/rest/users/me"), timeout=self.timeout)
+        return response.headers.get("X-Mantis-Version")
+
+    def find_project(self, name):
+        """Project id for a project name, or None"""
+        self._ensure_login()
+        if self.api_token:
+            for project in self._rest("GET", "projects").get("projects", []):
+                if project["name"] == name:
+                    return project["id"]
+            return None
+
+        page = self._get("manage_proj_page.php").text
+        for project_id, project_name in re.findall(
+                r'manage_proj_edit_page\.php\?project_id=(\d+)"[^>]*>([^<]+)<', page):
+            if html.unescape(project_name).strip() == name:
+                return int(project_id)
+        return None
+
+    def create_project(self, name=None, description="", status="development", public=True):
+        """Create a project and return its id"""
+        self._ensure_login()
+        name = name or f"Test Project {int(time.time() * 1000)}"
+
+        if self.api_token:
+            data = self._rest("POST", "projects", json={
+                "name": name, "description": description, "enabled": True,
+                "status": {"name": status},
+                "view_state": {"name": "public" if public else "private"},
+            })
+            return data["project"]["id"]
+
+        page = self._get("manage_proj_create_page.php").text
+        response = self._post("manage_proj_create.php", {
+            "manage_proj_create_token": self._form_token(page, "manage_proj_create"),
+            "name": name,
+            "status": {"development": 10, "release": 30, "stable": 50, "obsolete": 70}[status],
+            "view_state": 10 if public else 50,
+            "inherit_global": "on",
+            "description": description,
+        })
+        error = self._error(response.text)
+        if error:
+            raise MantisError(f"Could not create project '{name}': {error}")
+
+        project_id = self.find_project(name)
+        if project_id is None:
+            raise MantisError(f"Project '{name}' was not created")
+        logging.info(f"Mantis client: created project {project_id} '{name}'")
+        return project_id
+
+    def report_issue(self, project_id, summary=None, description="Reported by the test fixture setup.",
+                     category_id=None, severity="minor", priority="normal",
+                     reproducibility="have not tried"):
+        """Report an issue and return its id"""
+        self._ensure_login()
+        summary = summary or f"Fixture issue {int(time.time() * 1000)}"
+
+        if self.api_token:
+            data = self._rest("POST", "issues", json={
+                "project": {"id": project_id}, "summary": summary, "description": description,
+                "category": {"id": category_id} if category_id else {"name": "General"},
+                "severity": {"name": severity}, "priority": {"name": priority},
+                "reproducibility": {"name": reproducibility},
+            })
+            return data["issue"]["id"]
+
+        page = self._get("bug_report_page.php", project_id=project_id).text
+        if category_id is None:
+            # First real option of the category dropdown
+            select = re.search(r'<select[^>]*name="category_id".*?</select>', page, re.S)
+            options = re.findall(r'<option value="(\d+)"', select.group(0)) if select else []
+            category_id = next((int(v) for v in options if v != "0"), 1)
+
+        response = self._post("bug_report.php", {
+            "bug_report_token": self._form_token(page, "bug_report"),
+            "m_id": 0,
+            "project_id": project_id,
+            "category_id": category_id,
+            "reproducibility": REPRODUCIBILITY[reproducibility],
+            "severity": SEVERITY[severity],
+            "priority": PRIORITY[priority],
+            "summary": summary,
+            "description": description,
+        })
+        issue_id = self._submitted_issue_id(response)
+        if issue_id is None:
+            raise MantisError(f"Could not report issue: {self._error(response.text) or 'no issue id returned'}")
+        logging.info(f"Mantis client: reported issue {issue_id} in project {project_id}")
+        return issue_id
+
+    def get_issue(self, issue_id):
+        """Current summary, status and handler of an issue"""
+        self._ensure_login()
+
+        if self.api_token:
+            issue = self._rest("GET", f"issues/{issue_id}")["issues"][0]
+            return {
+                "id": issue["id"],
+                "summary": issue["summary"],
+                "status": issue["status"]["name"],
+                "handler": issue.get("handler", {}).get("name"),
+            }
+
+        page = self._get("view.php", id=issue_id).text
+
+        def cell(css_class):
+            match = re.search(rf'<td class="{css_class}"[^>]*>(.*?)</td>', page, re.S)
+            return html.unescape(re.sub(r"<[^>]+>|\s+", " ", match.group(1))).strip() if match else None
+
+        if cell("bug-id") is None:
+            raise MantisError(f"Issue {issue_id} not found")
+        return {
+            "id": int(issue_id),
+            "summary": cell("bug-summary"),
+            "status": (cell("bug-status") or "").split(" ")[0] or None,
+            "handler": cell("bug-assigned-to") or None,
+        }
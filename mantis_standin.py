@@ -0,0 +1,654 @@
+"""Stand-in for MantisBT: the pages the flows use, served from memory.
+
+A threaded WSGI server (standard library only) that renders copies of the
+MantisBT 2.x pages the suite visits, with the same form fields, locator
+hooks, redirects and "Operation successful." banners, backed by
+in-memory users, projects and issues. No PHP or database is needed:
+
+    python mantis_standin.py --port 8089
+    MANTIS_BASE_URL=http://127.0.0.1:8089/mantis python runner.py
+
+Every base path is a separate MantisBT (http://host:8089/a and
+http://host:8089/b share nothing), so parallel runs can each have their
+own. POST <base>/standin_reset.php puts a base path back to its seed
+data; logged-in sessions survive the reset.
+"""
+import argparse
+import html
+import json
+import secrets
+import socketserver
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, quote, urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+from config import USERNAME, PASSWORD, FIXTURE_PROJECT, STANDIN_HOST, STANDIN_PORT
+from mantis_client import STATUS, SEVERITY, PRIORITY, REPRODUCIBILITY
+
+VERSION = "2.26.0"
+COOKIE = "MANTIS_STRING_COOKIE"
+
+RESOLUTION = {"open": 10, "fixed": 20, "reopened": 30, "unable to reproduce": 40, "not fixable": 50,
+              "duplicate": 60, "no change required": 70, "suspended": 80, "won't fix": 90}
+PROJECT_STATUS = {"development": 10, "release": 30, "stable": 50, "obsolete": 70}
+VIEW_STATE = {"public": 10, "private": 50}
+
+# Pages reachable without a session
+PUBLIC = {"login_page.php", "login_password_page.php", "login.php", "standin_reset.php"}
+
+
+def label(enum, value):
+    """Name of an enum value, e.g. label(STATUS, 80) == "resolved" """
+    for name, number in enum.items():
+        if number == value:
+            return name
+    return str(value)
+
+
+def escape(value):
+    return html.escape(str(value), quote=True)
+
+
+class MantisState:
+    """Users, projects, issues and sessions of one stand-in MantisBT"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}   # cookie value -> {"user_id", "project_id", "token"}
+        self.reset()
+
+    def reset(self):
+        """Back to the seed data: two users, one project, one new issue"""
+        self.users = {
+            1: {"id": 1, "username": USERNAME, "password": PASSWORD},
+            2: {"id": 2, "username": "john", "password": "john"},
+        }
+        self.categories = {1: "General", 2: "Bug tracking Projects"}
+        self.projects = {}
+        self.issues = {}
+        self.next_project_id = 1
+        self.next_issue_id = 1
+        project_id = self.add_project(FIXTURE_PROJECT, description="Seed project of the stand-in.")
+        self.add_issue(project_id, 1, "Seed issue", "Issue that exists right after a reset.",
+                       category_id=1)
+
+    def add_project(self, name, status=10, view_state=10, description=""):
+        project_id = self.next_project_id
+        self.next_project_id += 1
+        self.projects[project_id] = {"id": project_id, "name": name, "status": status,
+                                     "view_state": view_state, "description": description}
+        return project_id
+
+    def add_issue(self, project_id, reporter_id, summary, description, category_id,
+                  severity=50, priority=30, reproducibility=70):
+        issue_id = self.next_issue_id
+        self.next_issue_id += 1
+        self.issues[issue_id] = {
+            "id": issue_id, "project_id": project_id, "reporter_id": reporter_id, "handler_id": 0,
+            "category_id": category_id, "summary": summary, "description": description,
+            "status": STATUS["new"], "resolution": RESOLUTION["open"], "severity": severity,
+            "priority": priority, "reproducibility": reproducibility, "updated_at": time.time(),
+        }
+        return issue_id
+
+    def user_name(self, user_id):
+        user = self.users.get(user_id)
+        return user["username"] if user else ""
+
+
+class Request:
+    """The parts of a WSGI request the pages look at"""
+
+    def __init__(self, environ, base, page):
+        self.method = environ["REQUEST_METHOD"]
+        self.base = base
+        self.page = page
+        self.query = environ.get("QUERY_STRING", "")
+        params = parse_qs(self.query, keep_blank_values=True)
+        if self.method == "POST":
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+            body = environ["wsgi.input"].read(length).decode("utf-8") if length else ""
+            params.update(parse_qs(body, keep_blank_values=True))
+        self.params = {name: values[-1] for name, values in params.items()}
+        cookies = SimpleCookie(environ.get("HTTP_COOKIE", ""))
+        self.cookie = cookies[COOKIE].value if COOKIE in cookies else None
+        self.session = None
+
+    def get(self, name, default=""):
+        return self.params.get(name, default)
+
+    def int(self, name, default=0):
+        try:
+            return int(self.params.get(name, default))
+        except ValueError:
+            return default
+
+
+class MantisStandIn:
+    """WSGI app serving the stand-in pages; one MantisState per base path"""
+
+    ROUTES = {
+        "login_page.php": "login_page",
+        "login_password_page.php": "login_password_page",
+        "login.php": "login",
+        "logout_page.php": "logout",
+        "my_view_page.php": "my_view_page",
+        "account_page.php": "account_page",
+        "login_select_proj_page.php": "select_project_page",
+        "set_project.php": "set_project",
+        "view_all_bug_page.php": "view_all_bug_page",
+        "bug_report_page.php": "bug_report_page",
+        "bug_report.php": "bug_report",
+        "view.php": "view_issue",
+        "bug_assign.php": "bug_assign",
+        "bug_update_page.php": "bug_update_page",
+        "bug_change_status_page.php": "bug_change_status_page",
+        "bug_update.php": "bug_update",
+        "manage_proj_page.php": "manage_proj_page",
+        "manage_proj_create_page.php": "manage_proj_create_page",
+        "manage_proj_create.php": "manage_proj_create",
+        "manage_proj_edit_page.php": "manage_proj_edit_page",
+        "standin_reset.php": "reset",
+    }
+
+    def __init__(self):
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def state(self, base):
+        with self.lock:
+            if base not in self.states:
+                self.states[base] = MantisState()
+            return self.states[base]
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "/")
+        if "/api/rest/" in path:
+            base, _, endpoint = path.partition("/api/rest/")
+            status, headers, body = self.rest(environ, base, endpoint)
+        else:
+            base, _, page = path.rpartition("/")
+            status, headers, body = self.page(environ, base, page or "my_view_page.php")
+        body = body.encode("utf-8")
+        start_response(status, headers + [("Content-Length", str(len(body)))])
+        return [body]
+
+    def page(self, environ, base, page):
+        if page not in self.ROUTES:
+            return "404 Not Found", [("Content-Type", "text/plain")], f"No page {page}"
+        request = Request(environ, base, page)
+        state = self.state(base)
+        with state.lock:
+            request.session = state.sessions.get(request.cookie)
+            if request.session is None and page not in PUBLIC:
+                target = page + (f"?{request.query}" if request.query else "")
+                return self.redirect(request, f"login_page.php?return={quote(target)}")
+            return getattr(self, self.ROUTES[page])(state, request)
+
+    def rest(self, environ, base, endpoint):
+        headers = [("Content-Type", "application/json"), ("X-Mantis-Version", VERSION)]
+        request = Request(environ, base, endpoint)
+        state = self.state(base)
+        with state.lock:
+            session = state.sessions.get(request.cookie)
+            if endpoint == "users/me" and session:
+                user = state.users[session["user_id"]]
+                return "200 OK", headers, json.dumps({"id": user["id"], "name": user["username"]})
+        return "401 Unauthorized", headers, json.dumps({"message": "API token required"})
+
+    # Responses
+
+    def redirect(self, request, target, cookie=None):
+        headers = [("Location", f"{request.base}/{target}")]
+        if cookie is not None:
+            headers.append(("Set-Cookie", cookie))
+        return "302 Found", headers, ""
+
+    def html(self, state, request, title, content):
+        nav = ""
+        if request.session:
+            user = state.user_name(request.session["user_id"])
+            nav = f"""
+<div id="navbar" class="navbar">
+  <a href="my_view_page.php">My View</a> | <a href="view_all_bug_page.php">View Issues</a> |
+  <a href="bug_report_page.php">Report Issue</a> | <a href="manage_proj_page.php">Manage</a>
+  <span class="user-info"><a href="account_page.php">{escape(user)}</a> |
+  <a href="logout_page.php">Logout</a></span>
+</div>"""
+        page = f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{escape(title)} - MantisBT</title></head>
+<body>{nav}
+<div class="main-content">
+<div class="page-content">
+{content}
+</div>
+</div>
+<div class="footer">MantisBT {VERSION} (stand-in)</div>
+</body>
+</html>"""
+        return "200 OK", [("Content-Type", "text/html; charset=utf-8")], page
+
+    def success(self, state, request, target, button="Proceed", details=""):
+        return self.html(state, request, "Operation successful", f"""
+<div class="alert alert-success center">
+  <p class="bold bigger-110">Operation successful.</p>{details}
+  <div class="btn-group"><a class="btn btn-primary btn-white btn-round" href="{target}">{button}</a></div>
+</div>""")
+
+    def error(self, state, request, message, number=0):
+        return self.html(state, request, "Error", f"""
+<div class="alert alert-danger">
+  <p class="bold">APPLICATION ERROR #{number}</p>
+  <p>{escape(message)}</p>
+  <p>Please use the "Back" button in your web browser to return to the previous page.</p>
+</div>""")
+
+    def token_field(self, request, form):
+        return f'<input type="hidden" name="{form}_token" value="{request.session["token"]}" />'
+
+    def valid_token(self, request, form):
+        return request.get(f"{form}_token") == request.session["token"]
+
+    def options(self, enum, selected=None):
+        return "".join(f'<option value="{value}"{" selected" if value == selected else ""}>{escape(name)}</option>'
+                       for name, value in enum.items())
+
+    def user_options(self, state, selected=0):
+        return '<option value="0"></option>' + "".join(
+            f'<option value="{user["id"]}"{" selected" if user["id"] == selected else ""}>'
+            f'{escape(user["username"])}</option>' for user in state.users.values())
+
+    # Login
+
+    def login_page(self, state, request):
+        message = ""
+        if request.get("error"):
+            message = ('<div class="alert alert-danger"><p>Your account may be disabled or blocked or '
+                       'the username/password you entered is incorrect.</p></div>')
+        return self.html(state, request, "Login", f"""{message}
+<form id="login-form" method="post" action="login_password_page.php">
+  <input type="hidden" name="return" value="{escape(request.get("return"))}" />
+  <label for="username">Username</label>
+  <input id="username" name="username" type="text" size="32" maxlength="191" class="form-control" autofocus />
+  <input type="submit" class="width-40 pull-right btn btn-success btn-inverse bigger-110" value="Login" />
+</form>""")
+
+    def login_password_page(self, state, request):
+        return self.html(state, request, "Login", f"""
+<form id="login-form" method="post" action="login.php">
+  <input type="hidden" name="username" value="{escape(request.get("username"))}" />
+  <input type="hidden" name="return" value="{escape(request.get("return"))}" />
+  <p>Enter password for '{escape(request.get("username"))}'</p>
+  <label for="password">Password</label>
+  <input id="password" name="password" type="password" size="32" maxlength="1024" class="form-control" />
+  <input type="submit" class="width-40 pull-right btn btn-success btn-inverse bigger-110" value="Login" />
+</form>""")
+
+    def login(self, state, request):
+        user = next((u for u in state.users.values() if u["username"] == request.get("username")), None)
+        if user is None or user["password"] != request.get("password"):
+            return self.redirect(request, "login_page.php?" + urlencode({"error": 1,
+                                                                       "username": request.get("username")}))
+        cookie = secrets.token_hex(32)
+        state.sessions[cookie] = {"user_id": user["id"], "project_id": None, "token": secrets.token_hex(16)}
+        return self.redirect(request, request.get("return") or "my_view_page.php",
+                             cookie=f"{COOKIE}={cookie}; Path={request.base}/; HttpOnly")
+
+    def logout(self, state, request):
+        state.sessions.pop(request.cookie, None)
+        return self.redirect(request, "login_page.php",
+                             cookie=f"{COOKIE}=; Path={request.base}/; Max-Age=0")
+
+    def reset(self, state, request):
+        if request.method != "POST":
+            return "405 Method Not Allowed", [("Content-Type", "text/plain")], "POST to reset"
+        state.reset()
+        return "200 OK", [("Content-Type", "application/json")], json.dumps({"reset": request.base})
+
+    # Overview pages
+
+    def issue_rows(self, state, issues):
+        rows = []
+        for issue in sorted(issues, key=lambda i: i["updated_at"], reverse=True):
+            rows.append(f"""
+<tr>
+  <td class="column-id"><a href="view.php?id={issue["id"]}">{issue["id"]:07d}</a></td>
+  <td class="column-category">{escape(state.categories.get(issue["category_id"], ""))}</td>
+  <td class="column-severity">{label(SEVERITY, issue["severity"])}</td>
+  <td class="column-status">{label(STATUS, issue["status"])}</td>
+  <td class="column-handler">{escape(state.user_name(issue["handler_id"]))}</td>
+  <td class="column-summary">{escape(issue["summary"])}</td>
+</tr>""")
+        return "".join(rows)
+
+    def my_view_page(self, state, request):
+        user_id = request.session["user_id"]
+        assigned = [i for i in state.issues.values() if i["handler_id"] == user_id]
+        reported = [i for i in state.issues.values() if i["reporter_id"] == user_id]
+        return self.html(state, request, "My View", f"""
+<h4>Assigned to Me (Unresolved)</h4>
+<table class="table my-buglist">{self.issue_rows(state, assigned)}</table>
+<h4>Reported by Me</h4>
+<table class="table my-buglist">{self.issue_rows(state, reported)}</table>""")
+
+    def account_page(self, state, request):
+        user = state.users[request.session["user_id"]]
+        return self.html(state, request, "My Account", f"""
+<h4>Edit Account</h4>
+<table class="table"><tr><th>Username</th><td>{escape(user["username"])}</td></tr></table>""")
+
+    def view_all_bug_page(self, state, request):
+        issues = list(state.issues.values())
+        return self.html(state, request, "View Issues", f"""
+<h4>Viewing Issues (1 - {len(issues)} / {len(issues)})</h4>
+<table id="buglist" class="table table-bordered table-condensed table-hover table-striped">
+<thead><tr><th>ID</th><th>Category</th><th>Severity</th><th>Status</th><th>Assigned To</th><th>Summary</th></tr></thead>
+<tbody>{self.issue_rows(state, issues)}</tbody>
+</table>""")
+
+    # Reporting
+
+    def select_project_page(self, state, request):
+        options = "".join(f'<option value="{p["id"]}">{escape(p["name"])}</option>'
+                          for p in state.projects.values())
+        return self.html(state, request, "Select Project", f"""
+<form method="post" action="set_project.php">
+  <input type="hidden" name="ref" value="{escape(request.get("ref"))}" />
+  <h4>Choose Project</h4>
+  <select name="project_id" class="input-sm">{options}</select>
+  <input type="submit" class="btn btn-primary btn-sm btn-white btn-round" value="Select Project" />
+</form>""")
+
+    def set_project(self, state, request):
+        if request.int("project_id") in state.projects:
+            request.session["project_id"] = request.int("project_id")
+        return self.redirect(request, request.get("ref") or "my_view_page.php")
+
+    def bug_report_page(self, state, request):
+        project_id = request.int("project_id") or request.session["project_id"]
+        if project_id not in state.projects:
+            return self.redirect(request, "login_select_proj_page.php?ref=bug_report_page.php")
+        categories = "".join(f'<option value="{category_id}">[All Projects] {escape(name)}</option>'
+                             for category_id, name in state.categories.items())
+        return self.html(state, request, "Report Issue", f"""
+<form id="report_bug_form" method="post" action="bug_report.php">
+  {self.token_field(request, "bug_report")}
+  <input type="hidden" name="m_id" value="0" />
+  <input type="hidden" name="project_id" value="{project_id}" />
+  <h4>Enter Issue Details</h4>
+  <table class="table table-bordered table-condensed">
+  <tr><th class="category"><label for="category_id">Category</label></th>
+      <td><select id="category_id" name="category_id" class="autofocus input-sm">
+          <option value="0" selected>(select)</option>{categories}</select></td></tr>
+  <tr><th class="category"><label for="reproducibility">Reproducibility</label></th>
+      <td><select id="reproducibility" name="reproducibility" class="input-sm">
+          {self.options(REPRODUCIBILITY, REPRODUCIBILITY["have not tried"])}</select></td></tr>
+  <tr><th class="category"><label for="severity">Severity</label></th>
+      <td><select id="severity" name="severity" class="input-sm">{self.options(SEVERITY, SEVERITY["minor"])}</select></td></tr>
+  <tr><th class="category"><label for="priority">Priority</label></th>
+      <td><select id="priority" name="priority" class="input-sm">{self.options(PRIORITY, PRIORITY["normal"])}</select></td></tr>
+  <tr><th class="category"><label for="summary">Summary</label></th>
+      <td><input id="summary" name="summary" type="text" size="105" maxlength="128" class="input-sm" /></td></tr>
+  <tr><th class="category"><label for="description">Description</label></th>
+      <td><textarea id="description" name="description" cols="80" rows="10" class="form-control"></textarea></td></tr>
+  </table>
+  <input type="submit" class="btn btn-primary btn-white btn-round" value="Submit Issue" />
+</form>""")
+
+    def bug_report(self, state, request):
+        if not self.valid_token(request, "bug_report"):
+            return self.error(state, request, "Invalid form security token.", 2800)
+        project_id = request.int("project_id") or request.session["project_id"]
+        if project_id not in state.projects:
+            return self.error(state, request, "Project not found.", 700)
+        for field, name in (("category_id", "Category"), ("summary", "Summary"), ("description", "Description")):
+            if request.get(field) in ("", "0"):
+                return self.error(state, request,
+                                  f'A necessary field "{name}" was empty. Please recheck your inputs.', 11)
+        issue_id = state.add_issue(project_id, request.session["user_id"], request.get("summary"),
+                                   request.get("description"), request.int("category_id"),
+                                   severity=request.int("severity", 50), priority=request.int("priority", 30),
+                                   reproducibility=request.int("reproducibility", 70))
+        return self.success(state, request, f"view.php?id={issue_id}", "View Submitted Issue")
+
+    # Issues
+
+    def find_issue(self, state, request, name):
+        return state.issues.get(request.int(name))
+
+    def view_issue(self, state, request):
+        issue = self.find_issue(state, request, "id")
+        if issue is None:
+            return self.error(state, request, f"Issue {request.get('id')} not found.", 1100)
+        project = state.projects.get(issue["project_id"], {})
+        return self.html(state, request, f"{issue['id']:07d}: {issue['summary']}", f"""
+<h4>View Issue Details</h4>
+<table class="table table-bordered table-condensed">
+<tr class="bug-header"><th class="bug-id category">ID</th><th class="bug-project category">Project</th>
+    <th class="bug-category category">Category</th></tr>
+<tr class="bug-header-data"><td class="bug-id">{issue["id"]:07d}</td>
+    <td class="bug-project">{escape(project.get("name", ""))}</td>
+    <td class="bug-category">[All Projects] {escape(state.categories.get(issue["category_id"], ""))}</td></tr>
+<tr><th class="bug-reporter category">Reporter</th>
+    <td class="bug-reporter">{escape(state.user_name(issue["reporter_id"]))}</td></tr>
+<tr><th class="bug-assigned-to category">Assigned To</th>
+    <td class="bug-assigned-to">{escape(state.user_name(issue["handler_id"]))}</td></tr>
+<tr><th class="bug-priority category">Priority</th><td class="bug-priority">{label(PRIORITY, issue["priority"])}</td>
+    <th class="bug-severity category">Severity</th><td class="bug-severity">{label(SEVERITY, issue["severity"])}</td></tr>
+<tr><th class="bug-status category">Status</th><td class="bug-status">{label(STATUS, issue["status"])}</td>
+    <th class="bug-resolution category">Resolution</th>
+    <td class="bug-resolution">{label(RESOLUTION, issue["resolution"])}</td></tr>
+<tr><th class="bug-summary category">Summary</th><td class="bug-summary">{escape(issue["summary"])}</td></tr>
+<tr><th class="bug-description category">Description</th>
+    <td class="bug-description">{escape(issue["description"])}</td></tr>
+</table>
+<div class="btn-group">
+  <form method="get" action="bug_update_page.php" class="form-inline">
+    <input type="hidden" name="bug_id" value="{issue["id"]}" />
+    <input type="submit" class="btn btn-primary btn-sm btn-white btn-round" value="Edit" />
+  </form>
+  <form method="post" action="bug_assign.php" class="form-inline">
+    {self.token_field(request, "bug_assign")}
+    <input type="hidden" name="bug_id" value="{issue["id"]}" />
+    <input type="submit" class="btn btn-primary btn-sm btn-white btn-round" value="Assign To:" />
+    <select name="handler_id" class="input-sm">{self.user_options(state, issue["handler_id"])}</select>
+  </form>
+  <form method="get" action="bug_change_status_page.php" class="form-inline">
+    <input type="hidden" name="id" value="{issue["id"]}" />
+    <input type="submit" class="btn btn-primary btn-sm btn-white btn-round" value="Change Status To:" />
+    <select name="new_status" class="input-sm">{self.options(STATUS, issue["status"])}</select>
+  </form>
+</div>""")
+
+    def bug_assign(self, state, request):
+        issue = self.find_issue(state, request, "bug_id")
+        if issue is None:
+            return self.error(state, request, f"Issue {request.get('bug_id')} not found.", 1100)
+        if not self.valid_token(request, "bug_assign"):
+            return self.error(state, request, "Invalid form security token.", 2800)
+        issue["handler_id"] = request.int("handler_id")
+        # MantisBT moves a new issue to "assigned" when it gets a handler
+        if issue["handler_id"] and issue["status"] < STATUS["assigned"]:
+            issue["status"] = STATUS["assigned"]
+        issue["updated_at"] = time.time()
+        return self.success(state, request, f"view.php?id={issue['id']}")
+
+    def bug_update_page(self, state, request):
+        issue = self.find_issue(state, request, "bug_id")
+        if issue is None:
+            return self.error(state, request, f"Issue {request.get('bug_id')} not found.", 1100)
+        return self.html(state, request, "Update Issue", f"""
+<form id="update_bug_form" method="post" action="bug_update.php">
+  {self.token_field(request, "bug_update")}
+  <input type="hidden" name="bug_id" value="{issue["id"]}" />
+  <h4>Updating Issue Information</h4>
+  <table class="table table-bordered table-condensed">
+  <tr><th class="category"><label for="handler_id">Assigned To</label></th>
+      <td><select id="handler_id" name="handler_id" class="input-sm">{self.user_options(state, issue["handler_id"])}</select></td></tr>
+  <tr><th class="category"><label for="priority">Priority</label></th>
+      <td><select id="priority" name="priority" class="input-sm">{self.options(PRIORITY, issue["priority"])}</select></td></tr>
+  <tr><th class="category"><label for="severity">Severity</label></th>
+      <td><select id="severity" name="severity" class="input-sm">{self.options(SEVERITY, issue["severity"])}</select></td></tr>
+  <tr><th class="category"><label for="status">Status</label></th>
+      <td><select id="status" name="status" class="input-sm">{self.options(STATUS, issue["status"])}</select></td></tr>
+  <tr><th class="category"><label for="resolution">Resolution</label></th>
+      <td><select id="resolution" name="resolution" class="input-sm">{self.options(RESOLUTION, issue["resolution"])}</select></td></tr>
+  <tr><th class="category"><label for="summary">Summary</label></th>
+      <td><input id="summary" name="summary" type="text" size="105" maxlength="128" value="{escape(issue["summary"])}" /></td></tr>
+  <tr><th class="category"><label for="description">Description</label></th>
+      <td><textarea id="description" name="description" cols="80" rows="10">{escape(issue["description"])}</textarea></td></tr>
+  </table>
+  <input type="submit" class="btn btn-primary btn-white btn-round" value="Update Information" />
+</form>""")
+
+    def bug_change_status_page(self, state, request):
+        issue = self.find_issue(state, request, "id")
+        if issue is None:
+            return self.error(state, request, f"Issue {request.get('id')} not found.", 1100)
+        new_status = request.int("new_status", issue["status"])
+        return self.html(state, request, "Change Status", f"""
+<form id="bug-change-status-form" method="post" action="bug_update.php">
+  {self.token_field(request, "bug_update")}
+  <input type="hidden" name="bug_id" value="{issue["id"]}" />
+  <h4>Change Status of Issue {issue["id"]:07d}</h4>
+  <table class="table table-bordered table-condensed">
+  <tr><th class="category">New Status</th>
+      <td><select name="new_status" class="input-sm">{self.options(STATUS, new_status)}</select></td></tr>
+  <tr><th class="category"><label for="resolution">Resolution</label></th>
+      <td><select id="resolution" name="resolution" class="input-sm">{self.options(RESOLUTION, RESOLUTION["fixed"])}</select></td></tr>
+  </table>
+  <input type="submit" class="btn btn-primary btn-white btn-round" value="Change Status" />
+</form>""")
+
+    def bug_update(self, state, request):
+        issue = self.find_issue(state, request, "bug_id")
+        if issue is None:
+            return self.error(state, request, f"Issue {request.get('bug_id')} not found.", 1100)
+        if not self.valid_token(request, "bug_update"):
+            return self.error(state, request, "Invalid form security token.", 2800)
+        # The update page posts "status", the change-status page "new_status"
+        status = request.int("new_status") or request.int("status") or issue["status"]
+        issue.update({
+            "status": status,
+            "handler_id": request.int("handler_id", issue["handler_id"]),
+            "priority": request.int("priority", issue["priority"]),
+            "severity": request.int("severity", issue["severity"]),
+            "resolution": request.int("resolution", issue["resolution"]),
+            "summary": request.get("summary") or issue["summary"],
+            "description": request.get("description") or issue["description"],
+            "updated_at": time.time(),
+        })
+        if status >= STATUS["resolved"] and issue["resolution"] == RESOLUTION["open"]:
+            issue["resolution"] = RESOLUTION["fixed"]
+        return self.success(state, request, f"view.php?id={issue['id']}")
+
+    # Projects
+
+    def manage_proj_page(self, state, request):
+        rows = "".join(f"""
+<tr><td><a href="manage_proj_edit_page.php?project_id={p["id"]}">{escape(p["name"])}</a></td>
+    <td>{label(PROJECT_STATUS, p["status"])}</td><td>{label(VIEW_STATE, p["view_state"])}</td>
+    <td>{escape(p["description"])}</td></tr>""" for p in state.projects.values())
+        return self.html(state, request, "Manage Projects", f"""
+<h4>Projects</h4>
+<a class="btn btn-primary btn-white btn-round btn-sm" href="manage_proj_create_page.php">Create New Project</a>
+<table class="table table-striped table-bordered table-condensed table-hover">
+<thead><tr><th>Name</th><th>Status</th><th>View Status</th><th>Description</th></tr></thead>
+<tbody>{rows}</tbody>
+</table>""")
+
+    def manage_proj_create_page(self, state, request):
+        return self.html(state, request, "Add Project", f"""
+<form method="post" id="manage-project-create-form" action="manage_proj_create.php">
+  {self.token_field(request, "manage_proj_create")}
+  <h4>Add Project</h4>
+  <table class="table table-bordered table-condensed table-striped">
+  <tr><th class="category"><label for="project-name">Project Name</label></th>
+      <td><input type="text" id="project-name" name="name" class="input-sm" size="60" maxlength="128" /></td></tr>
+  <tr><th class="category"><label for="project-status">Status</label></th>
+      <td><select id="project-status" name="status" class="input-sm">{self.options(PROJECT_STATUS)}</select></td></tr>
+  <tr><th class="category"><label for="project-inherit-global">Inherit Global Categories</label></th>
+      <td><input type="checkbox" class="ace" id="project-inherit-global" name="inherit_global" checked /></td></tr>
+  <tr><th class="category"><label for="project-view-state">View Status</label></th>
+      <td><select id="project-view-state" name="view_state" class="input-sm">{self.options(VIEW_STATE)}</select></td></tr>
+  <tr><th class="category"><label for="project-description">Description</label></th>
+      <td><textarea class="form-control" id="project-description" name="description" cols="70" rows="5"></textarea></td></tr>
+  </table>
+  <input type="submit" class="btn btn-primary btn-white btn-round" value="Add Project" />
+</form>""")
+
+    def manage_proj_create(self, state, request):
+        if not self.valid_token(request, "manage_proj_create"):
+            return self.error(state, request, "Invalid form security token.", 2800)
+        name = request.get("name").strip()
+        if not name:
+            return self.error(state, request, 'A necessary field "Project Name" was empty. Please recheck your inputs.', 11)
+        if any(p["name"] == name for p in state.projects.values()):
+            return self.error(state, request, "A project with that name already exists. Please go back and enter a different name.", 701)
+        state.add_project(name, status=request.int("status", 10), view_state=request.int("view_state", 10),
+                          description=request.get("description"))
+        return self.success(state, request, "manage_proj_page.php")
+
+    def manage_proj_edit_page(self, state, request):
+        project = state.projects.get(request.int("project_id"))
+        if project is None:
+            return self.error(state, request, f"Project \"{request.get('project_id')}\" not found.", 700)
+        return self.html(state, request, "Edit Project", f"""
+<h4>Edit Project</h4>
+<table class="table table-bordered table-condensed">
+<tr><th>Project Name</th><td>{escape(project["name"])}</td></tr>
+<tr><th>Status</th><td>{label(PROJECT_STATUS, project["status"])}</td></tr>
+<tr><th>View Status</th><td>{label(VIEW_STATE, project["view_state"])}</td></tr>
+<tr><th>Description</th><td>{escape(project["description"])}</td></tr>
+</table>""")
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start(host=STANDIN_HOST, port=STANDIN_PORT):
+    """Serve the stand-in on a background thread; port=0 picks a free port.
+
+    Returns the server; stop it with server.shutdown().
+    """
+    server = make_server(host, port, MantisStandIn(), server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, name="mantis-standin", daemon=True).start()
+    return server
+
+
+def reset(base_url):
+    """Put the stand-in MantisBT at `base_url` back to its seed data"""
+    import requests
+    requests.post(f"{base_url}/standin_reset.php", timeout=10).raise_for_status()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve an in-memory MantisBT stand-in")
+    parser.add_argument("--host", default=STANDIN_HOST)
+    parser.add_argument("--port", type=int, default=STANDIN_PORT)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, MantisStandIn(), server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    print(f"🧪 MantisBT stand-in on http://{args.host}:{server.server_port}/mantis")
+    print(f"   export MANTIS_BASE_URL=http://{args.host}:{server.server_port}/mantis")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Page objects for the MantisBT pages the flows drive.
+
+Each page lists its elements as named locators with fallback candidates.
+An element is looked up the first time it is used (all candidates in one
+find_first call, the one that matched on earlier runs first, see
+locator_stats.py) and then served from a cache until the browser loads
+another document:
+
+    page = BugUpdatePage(driver).open(issue_id=42)
+    page.select("status").select_by_value("80")
+    page.element("status")      # cached, no round-trip
+"""
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import Select
+import locator_stats
+import routes
+from locators import find_first, query_all, select_options
+from snapshot import page_snapshot
+from waits import document_ready, load_count, navigation, wait_for
+
+SUBMIT = [
+    (By.CSS_SELECTOR, "input[type='submit']"),
+    (By.CSS_SELECTOR, "button[type='submit']"),
+]
+
+LOGGED_IN_JS = """
+return !!document.querySelector("a[href*='account_page.php'], a[href*='logout_page.php']");
+"""
+
+
+class Page:
+    """Base page: named locators, resolved lazily and cached per page load"""
+
+    route = None
+    locators = {}
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._cache = {}
+        self._load = load_count(driver)
+        self._snapshot = None
+
+    def open(self, **params):
+        self.driver.get(routes.url(self.route, **params))
+        return self
+
+    def _check_load(self):
+        load = load_count(self.driver)
+        if load != self._load:
+            self.invalidate()
+            self._load = load
+
+    def invalidate(self):
+        """Forget every cached element and snapshot"""
+        self._cache.clear()
+        self._snapshot = None
+
+    def find(self, name, displayed=False):
+        """Element for a named locator, or None; cached until the next page load"""
+        self._check_load()
+        key = (name, displayed)
+        if key not in self._cache:
+            page = type(self).__name__
+            candidates = locator_stats.order(page, name, self.locators[name])
+            element, selector = find_first(self.driver, candidates, displayed=displayed)
+            locator_stats.record(page, name, candidates, selector)
+            self._cache[key] = element
+        return self._cache[key]
+
+    def element(self, name, displayed=False):
+        element = self.find(name, displayed)
+        if element is None:
+            raise NoSuchElementException(f"{type(self).__name__}: no '{name}' element")
+        return element
+
+    def select(self, name):
+        return Select(self.element(name))
+
+    def options(self, name):
+        """text/value of a named <select>'s options (see locators.select_options)"""
+        return select_options(self.driver, self.element(name))
+
+    def fill(self, name, text):
+        field = self.element(name)
+        field.clear()
+        field.send_keys(text)
+        return field
+
+    def wait_for(self, name, timeout=30):
+        """Wait until any of a named locator's candidates is present.
+
+        Each poll tries every candidate in one find_first call, the usual
+        winner first, so a winner gone stale on this version falls back to
+        the others instead of timing out.
+        """
+        self._check_load()
+        page = type(self).__name__
+        candidates = locator_stats.order(page, name, self.locators[name])
+
+        def present(driver):
+            element, selector = find_first(driver, candidates)
+            return (element, selector) if element is not None else False
+
+        element, selector = wait_for(self.driver, present, timeout, f"{page}: '{name}' did not appear")
+        locator_stats.record(page, name, candidates, selector)
+        self._cache[(name, False)] = element
+        return element
+
+    def submit(self, name="submit", until=None):
+        """Click a named button and wait for the page it leads to"""
+        button = self.element(name, displayed=True)
+        with navigation(self.driver, until=until):
+            button.click()
+
+    def snapshot(self, refresh=False):
+        """page_snapshot() of the current document, cached until the next load"""
+        self._check_load()
+        if self._snapshot is None or refresh:
+            self._snapshot = page_snapshot(self.driver)
+        return self._snapshot
+
+
+class LoginPage(Page):
+    """MantisBT's two-step login: username page, then password page"""
+
+    route = "login"
+    locators = {
+        "username": [
+            (By.NAME, "username"),
+            (By.ID, "username"),
+            (By.XPATH, "//input[@type='text' and contains(@name, 'user')]"),
+            (By.XPATH, "//input[@type='text']"),
+        ],
+        "password": [
+            (By.NAME, "password"),
+            (By.ID, "password"),
+            (By.XPATH, "//input[@type='password']"),
+        ],
+        "submit": SUBMIT,
+    }
+
+    def is_logged_in(self):
+        return self.driver.execute_script(LOGGED_IN_JS)
+
+    def login(self, username, password, capture=None):
+        """Log in from the login page; raises when MantisBT does not accept it.
+
+        `capture(step_name)` is called at each step, e.g. the flow's
+        take_screenshot.
+        """
+        capture = capture or (lambda step_name: None)
+        wait_for(self.driver, document_ready())
+
+        self.fill("username", username)
+        capture("entered_username")
+
+        # MantisBT 1.x asks for both fields on one page
+        if self.find("password", displayed=True) is None:
+            self.submit()
+            capture("clicked_login_button")
+            if self.find("password") is None:
+                if self.is_logged_in():
+                    capture("already_logged_in")
+                    return True
+                capture("password_not_found")
+                raise NoSuchElementException("Password field not found")
+
+        self.fill("password", password)
+        capture("entered_password")
+        self.submit()
+        capture("submitted_form")
+
+        if not self.is_logged_in():
+            messages = self.snapshot()["messages"]
+            capture("login_error_detected")
+            raise Exception(f"Login failed - {messages[0] if messages else 'still not logged in'}")
+        capture("login_successful")
+        return True
+
+
+class ViewIssuesPage(Page):
+    route = "view_issues"
+    locators = {
+        "issue_links": [(By.XPATH, "//a[contains(@href, 'view.php?id=') or contains(@href, 'bug_view_page.php')]")],
+    }
+
+    def issue_links(self):
+        """Text and href of every issue link in the list, in one call"""
+        return query_all(self.driver, self.locators["issue_links"][0], ("href",), elements=True)
+
+    def first_issue_id(self):
+        for link in self.issue_links():
+            issue_id = routes.issue_id_from(link["href"])
+            if issue_id is not None:
+                return issue_id
+        return None
+
+
+class BugReportPage(Page):
+    route = "report_issue"
+    locators = {
+        "project_id": [(By.NAME, "project_id")],
+        "category": [(By.NAME, "category_id"), (By.ID, "category_id")],
+        "reproducibility": [(By.NAME, "reproducibility")],
+        "severity": [(By.NAME, "severity")],
+        "priority": [(By.NAME, "priority")],
+        "summary": [(By.NAME, "summary"), (By.ID, "summary")],
+        "description": [(By.NAME, "description"), (By.ID, "description")],
+        "select_project": [(By.CSS_SELECTOR, "input[type='submit']")],
+        "submit": [
+            (By.XPATH, "//input[@type='submit' and contains(@value, 'Submit Issue')]"),
+            (By.XPATH, "//input[@type='submit' and contains(@value, 'Submit')]"),
+            (By.CSS_SELECTOR, "input[type='submit'][value*='Issue']"),
+            (By.CSS_SELECTOR, "input[type='submit']"),
+        ],
+        # "View Submitted Issue" on the "Operation successful" page after submitting
+        "view_submitted": [
+            # Only the banner's link: the navbar and "recently visited" link other issues
+            (By.CSS_SELECTOR, ".alert-success a[href*='view.php?id=']"),
+        ],
+    }
+
+    def submitted_issue_id(self):
+        """Id of the issue just reported, from the success page's link to it, or None"""
+        link = self.find("view_submitted")
+        return routes.issue_id_from(link.get_attribute("href")) if link is not None else None
+
+    def needs_project(self):
+        """Whether MantisBT asks for a project before showing the form"""
+        snapshot = self.snapshot()
+        return "select_proj" in snapshot["url"] or (
+            self.find("project_id") is not None and self.find("summary") is None)
+
+
+class BugViewPage(Page):
+    route = "view_issue"
+    locators = {
+        "handler": [
+            (By.NAME, "handler_id"),
+            (By.ID, "handler_id"),
+            (By.XPATH, "//select[contains(@name, 'handler') or contains(@id, 'handler')]"),
+            (By.XPATH, "//select[option[contains(text(), 'john') or contains(text(), 'John')]]"),
+        ],
+        "assign_link": [(By.XPATH, "//a[contains(text(), 'Assign') or contains(@href, 'assign')]")],
+        "assign_submit": [
+            (By.XPATH, "//input[@type='submit' and (contains(@value, 'Update') or contains(@value, 'Assign') "
+                       "or contains(@value, 'Submit'))]"),
+            (By.CSS_SELECTOR, "input[type='submit']"),
+        ],
+    }
+
+
+class BugUpdatePage(Page):
+    route = "update_issue"
+    locators = {
+        "status": [
+            (By.NAME, "status"),
+            (By.ID, "status"),
+            (By.XPATH, "//select[@name='status']"),
+            (By.XPATH, "//select[contains(@name, 'status')]"),
+            (By.XPATH, "//select[option[contains(text(), 'resolved')]]"),
+        ],
+        "update": [
+            (By.XPATH, "//input[@type='submit' and (@value='Update Information' or @value='Update' "
+                       "or contains(@value, 'Update'))]"),
+            (By.XPATH, "//button[contains(text(), 'Update')]"),
+            (By.XPATH, "//input[@type='submit']"),
+            (By.XPATH, "//button"),
+        ],
+    }
+
+
+class ManageProjectCreatePage(Page):
+    route = "create_project"
+    locators = {
+        "name": [(By.NAME, "name")],
+        "status": [(By.NAME, "status")],
+        "view_state": [(By.NAME, "view_state")],
+        "inherit_global": [(By.NAME, "inherit_global")],
+        "description": [(By.NAME, "description")],
+        "submit": [(By.CSS_SELECTOR, "input[type='submit'][value='Add Project']")] + SUBMIT,
+    }
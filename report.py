@@ -0,0 +1,450 @@
+"""Paginated HTML report built from the structured result log.
+
+ReportWriter consumes test_results.jsonl entries one at a time and writes
+a report directory that stays small however long the run was:
+
+    report/index.html          static viewer, written once
+    report/data/summary.js     totals, per-test outcomes and the page list
+    report/data/chunk-NNNNN.js one page of REPORT_CHUNK_SIZE log entries
+    report/thumbs/<blob>.jpg   screenshot thumbnails (with Pillow)
+
+The viewer loads the summary and then only the page being looked at.
+Data files are JSON wrapped in a function call, so the report also opens
+from disk (file://), where browsers refuse to fetch() plain JSON.
+Screenshots are linked from screenshots/blobs/, never copied or inlined.
+Only the open page is held in memory while writing.
+
+    python report.py                 # report of everything in test_results.jsonl
+    python report.py --follow        # keep it up to date while a run writes the log
+    python runner.py --report        # report of just this run
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from config import (RESULT_LOG, SCREENSHOT_DIR, REPORT_DIR, REPORT_CHUNK_SIZE,
+                    REPORT_THUMB_WIDTH)
+from screenshots import manifest_path, run_of
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it the full screenshot is the thumbnail
+    Image = None
+
+# Entry fields kept on report pages
+FIELDS = ("time", "level", "message", "flow", "test", "step", "outcome", "duration", "url")
+
+
+def _write_atomic(path, text):
+    """Replace `path`, so a viewer reloading mid-write never sees half a file"""
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+def _script(callback, data):
+    return f"mantisReport.{callback}({json.dumps(data, ensure_ascii=False, separators=(',', ':'))});\n"
+
+
+class ScreenshotLinks:
+    """Resolves screenshot capture ids (see screenshots.capture) to the blob and thumbnail to link.
+
+    Only the manifests of runs that rendered records refer to are read,
+    and only the `keep_runs` most recently used are held in memory.
+    """
+
+    def __init__(self, out_dir, folder=SCREENSHOT_DIR, thumb_width=REPORT_THUMB_WIDTH, keep_runs=32):
+        self.out_dir = out_dir
+        self.folder = folder
+        self.thumb_width = thumb_width
+        self.keep_runs = keep_runs
+        # run -> [manifest bytes read so far, {capture id: blob}]
+        self._runs = OrderedDict()
+        self._thumbs = {}
+
+    def _blob(self, run, capture_id):
+        """Blob of a capture, reading the run's manifest lines written since the last read"""
+        if run in self._runs:
+            self._runs.move_to_end(run)
+        else:
+            self._runs[run] = [0, {}]
+            if len(self._runs) > self.keep_runs:
+                self._runs.popitem(last=False)
+        state = self._runs[run]
+        path = manifest_path(run, self.folder)
+        if capture_id not in state[1] and os.path.exists(path):
+            with open(path, "rb") as f:
+                f.seek(state[0])
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # still being written; read it next time
+                    state[0] += len(line)
+                    entry = json.loads(line)
+                    state[1][entry["id"]] = os.path.join(self.folder, entry["blob"])
+        return state[1].get(capture_id)
+
+    def _thumbnail(self, blob):
+        if blob in self._thumbs:
+            return self._thumbs[blob]
+        thumb = blob
+        if Image is not None and self.thumb_width:
+            name = os.path.splitext(os.path.basename(blob))[0] + ".jpg"
+            thumb = os.path.join(self.out_dir, "thumbs", name)
+            if not os.path.exists(thumb):
+                try:
+                    with Image.open(blob) as image:
+                        image.thumbnail((self.thumb_width, self.thumb_width * 4))
+                        image.convert("RGB").save(thumb, "JPEG", quality=70)
+                except OSError:
+                    thumb = blob
+        self._thumbs[blob] = thumb
+        return thumb
+
+    def links(self, capture_id):
+        """(image, thumbnail) paths relative to the report, or None when not written (yet)"""
+        blob = self._blob(run_of(capture_id), capture_id)
+        if blob is None or not os.path.exists(blob):
+            return None
+        return (os.path.relpath(blob, self.out_dir),
+                os.path.relpath(self._thumbnail(blob), self.out_dir))
+
+
+class ReportWriter:
+    """Writes a paginated report from log entries added one at a time"""
+
+    def __init__(self, out_dir=REPORT_DIR, chunk_size=REPORT_CHUNK_SIZE, title="MantisBT results"):
+        self.out_dir = out_dir
+        self.chunk_size = chunk_size
+        self.screenshots = ScreenshotLinks(out_dir)
+        self.summary = {"title": title, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "updated": None, "finished": False, "entries": 0,
+                        "outcomes": {"passed": 0, "failed": 0}, "tests": {}, "chunks": []}
+        self._chunk = []
+        self._chunk_failed = 0
+        self._changed = False
+
+        os.makedirs(os.path.join(out_dir, "data"), exist_ok=True)
+        os.makedirs(os.path.join(out_dir, "thumbs"), exist_ok=True)
+        for old in glob.glob(os.path.join(out_dir, "data", "chunk-*.js")):
+            os.remove(old)
+        _write_atomic(os.path.join(out_dir, "index.html"), VIEWER)
+        self._write_summary()
+
+    def add(self, entry):
+        """Add one result-log entry; only test steps, outcomes and warnings are kept"""
+        if "test" not in entry and entry.get("level") not in ("WARNING", "ERROR", "CRITICAL"):
+            return
+        row = {field: entry[field] for field in FIELDS if entry.get(field) is not None}
+        if entry.get("screenshot"):
+            links = self.screenshots.links(entry["screenshot"])
+            if links:
+                row["image"], row["thumb"] = links
+
+        failed = row.get("outcome") == "failed" or row.get("level") in ("ERROR", "CRITICAL")
+        if "outcome" in row:
+            self._add_outcome(row, len(self.summary["chunks"]))
+        self._chunk.append(row)
+        self._chunk_failed += failed
+        self.summary["entries"] += 1
+        self._changed = True
+        if len(self._chunk) >= self.chunk_size:
+            self._write_chunk()
+            self._chunk = []
+            self._chunk_failed = 0
+            self._write_summary()
+
+    def _add_outcome(self, row, page):
+        self.summary["outcomes"][row["outcome"]] = self.summary["outcomes"].get(row["outcome"], 0) + 1
+        test = self.summary["tests"].setdefault(row["test"], {"runs": 0, "failed": 0})
+        test["runs"] += 1
+        test["failed"] += row["outcome"] == "failed"
+        test["last"] = {"outcome": row["outcome"], "duration": row.get("duration"),
+                        "message": row.get("message"), "page": page}
+
+    def _write_chunk(self):
+        """Write the open page; it is rewritten until it is full"""
+        if not self._chunk:
+            return
+        index = len(self.summary["chunks"])
+        name = f"chunk-{index + 1:05d}.js"
+        _write_atomic(os.path.join(self.out_dir, "data", name), _script("chunk", [index, self._chunk]))
+        self.summary["chunks"].append({"file": name, "entries": len(self._chunk),
+                                       "failed": self._chunk_failed,
+                                       "first": self._chunk[0].get("time"),
+                                       "last": self._chunk[-1].get("time")})
+
+    def _write_summary(self):
+        self.summary["updated"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        _write_atomic(os.path.join(self.out_dir, "data", "summary.js"), _script("summary", self.summary))
+
+    def checkpoint(self):
+        """Publish the partly filled page, e.g. while following a live run"""
+        if not self._changed:
+            return
+        self._changed = False
+        self._write_chunk()
+        self._write_summary()
+        if self._chunk:
+            self.summary["chunks"].pop()
+
+    def close(self):
+        self._write_chunk()
+        self.summary["finished"] = True
+        self._write_summary()
+        return os.path.join(self.out_dir, "index.html")
+
+
+def log_files(path=RESULT_LOG):
+    """The result log and its rotated backups, oldest first"""
+    backups = [p for p in glob.glob(f"{glob.escape(path)}.*") if p[len(path) + 1:].isdigit()]
+    backups.sort(key=lambda p: int(p[len(path) + 1:]), reverse=True)
+    return backups + [path] if os.path.exists(path) else backups
+
+
+def read_log(path=RESULT_LOG, since=None):
+    """Entries of the result log, including rotated files, from `since` (ISO time) on"""
+    for log in log_files(path):
+        with open(log, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or entry.get("time", "") >= since:
+                    yield entry
+
+
+def follow(path=RESULT_LOG, since=None, idle=None, on_idle=None, poll=0.5):
+    """Entries of the result log as they are written, following rotation.
+
+    Stops after `idle` seconds without a new entry (None: never). `on_idle`
+    is called whenever the log has been read to its end.
+    """
+    handle, inode, partial = None, None, ""
+    quiet_since = time.monotonic()
+    try:
+        while True:
+            try:
+                current = os.stat(path).st_ino
+            except FileNotFoundError:
+                current = None
+            if handle is not None and current != inode:
+                # Rotated: finish the old file before switching
+                for line in handle:
+                    partial += line
+                    if partial.endswith("\n"):
+                        entry, partial = partial, ""
+                        yield from _parse(entry, since)
+                handle.close()
+                handle = None
+            if handle is None and current is not None:
+                handle = open(path, encoding="utf-8")
+                inode = current
+
+            got = False
+            for line in handle or ():
+                partial += line
+                if not partial.endswith("\n"):
+                    break  # half-written line; the rest comes with the next read
+                line, partial = partial, ""
+                got = True
+                yield from _parse(line, since)
+
+            if got:
+                quiet_since = time.monotonic()
+            else:
+                if on_idle:
+                    on_idle()
+                if idle is not None and time.monotonic() - quiet_since > idle:
+                    return
+                time.sleep(poll)
+    finally:
+        if handle is not None:
+            handle.close()
+
+
+def _parse(line, since):
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return
+    if since is None or entry.get("time", "") >= since:
+        yield entry
+
+
+def build(out_dir=REPORT_DIR, path=RESULT_LOG, since=None, chunk_size=REPORT_CHUNK_SIZE):
+    """Write a report of the result log; returns the path of its index.html"""
+    writer = ReportWriter(out_dir, chunk_size)
+    for entry in read_log(path, since):
+        writer.add(entry)
+    return writer.close()
+
+
+def now():
+    """Current time in the result log's format, for `since`"""
+    t = time.time()
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t)) + f".{int(t % 1 * 1000):03d}"
+
+
+VIEWER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>MantisBT results</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; font-size: 13px; margin: 20px; color: #333; }
+h1 { font-size: 22px; }
+table { border-collapse: collapse; width: 100%; margin-bottom: 16px; }
+th, td { border: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; }
+th { background: #f3f3f3; }
+.passed { color: #2a7d2a; } .failed, .ERROR, .CRITICAL { color: #c0392b; } .WARNING { color: #b9770e; }
+tr.failed td, tr.ERROR td { background: #fdf0ef; }
+img { max-width: 240px; border: 1px solid #ccc; }
+#pages button { margin: 0 2px 4px 0; } #pages button.current { font-weight: bold; }
+#pages button.has-failures { color: #c0392b; }
+.muted { color: #999; }
+</style>
+</head>
+<body>
+<h1 id="title">MantisBT results</h1>
+<p id="totals" class="muted">Loading...</p>
+<h2>Tests</h2>
+<table id="tests"><thead><tr><th>Test</th><th>Last outcome</th><th>Duration</th><th>Runs</th><th>Failed</th><th>Message</th></tr></thead><tbody></tbody></table>
+<h2>Log</h2>
+<p><label><input type="checkbox" id="failures-only"> Pages with failures only</label></p>
+<div id="pages"></div>
+<table id="entries"><thead><tr><th>Time</th><th>Test</th><th>Step</th><th>Outcome</th><th>Duration</th><th>Message</th><th>Screenshot</th></tr></thead><tbody></tbody></table>
+<script>
+var mantisReport = (function () {
+  var summary = null, chunks = {}, current = 0;
+
+  function cell(row, text, cls) {
+    var td = row.insertCell();
+    td.textContent = text === undefined || text === null ? "" : text;
+    if (cls) td.className = cls;
+    return td;
+  }
+  function seconds(value) { return value === undefined || value === null ? "" : value.toFixed(2) + "s"; }
+  function load(file, onload) {
+    var script = document.createElement("script");
+    script.src = "data/" + file + "?t=" + Date.now();
+    if (onload) script.onload = onload;
+    document.head.appendChild(script);
+  }
+
+  function renderSummary() {
+    document.title = document.getElementById("title").textContent = summary.title;
+    var outcomes = summary.outcomes;
+    document.getElementById("totals").textContent = outcomes.passed + " passed, " + outcomes.failed +
+      " failed, " + summary.entries + " log entries on " + summary.chunks.length + " pages - updated " +
+      summary.updated + (summary.finished ? "" : " (run in progress, reload for more)");
+    var body = document.querySelector("#tests tbody");
+    body.innerHTML = "";
+    Object.keys(summary.tests).sort().forEach(function (name) {
+      var test = summary.tests[name], row = body.insertRow();
+      row.className = test.last.outcome;
+      var link = cell(row, "");
+      var a = link.appendChild(document.createElement("a"));
+      a.href = "#"; a.textContent = name;
+      a.onclick = function () { show(test.last.page); return false; };
+      cell(row, test.last.outcome, test.last.outcome);
+      cell(row, seconds(test.last.duration));
+      cell(row, test.runs); cell(row, test.failed); cell(row, test.last.message);
+    });
+    renderPages();
+  }
+
+  function renderPages() {
+    var pages = document.getElementById("pages"), onlyFailures = document.getElementById("failures-only").checked;
+    pages.innerHTML = "";
+    summary.chunks.forEach(function (chunk, index) {
+      if (onlyFailures && !chunk.failed) return;
+      var button = pages.appendChild(document.createElement("button"));
+      button.textContent = index + 1;
+      button.title = chunk.first + " - " + chunk.last + ", " + chunk.failed + " failures";
+      button.className = (index === current ? "current " : "") + (chunk.failed ? "has-failures" : "");
+      button.onclick = function () { show(index); };
+    });
+  }
+
+  function renderChunk(rows) {
+    var body = document.querySelector("#entries tbody");
+    body.innerHTML = "";
+    rows.forEach(function (entry) {
+      var row = body.insertRow();
+      row.className = entry.outcome || entry.level;
+      cell(row, entry.time); cell(row, entry.test || entry.flow); cell(row, entry.step);
+      cell(row, entry.outcome, entry.outcome); cell(row, seconds(entry.duration));
+      var message = cell(row, entry.message, entry.level);
+      if (entry.url) {
+        message.appendChild(document.createElement("br"));
+        var a = message.appendChild(document.createElement("a"));
+        a.href = a.textContent = entry.url;
+      }
+      var shot = cell(row, "");
+      if (entry.thumb) {
+        var link = shot.appendChild(document.createElement("a"));
+        link.href = entry.image;
+        var img = link.appendChild(document.createElement("img"));
+        img.loading = "lazy"; img.src = entry.thumb;
+      }
+    });
+  }
+
+  function show(index) {
+    if (!summary.chunks[index]) return;
+    current = index;
+    renderPages();
+    if (chunks[index] && summary.finished) renderChunk(chunks[index]);
+    else load(summary.chunks[index].file);
+  }
+
+  document.getElementById("failures-only").onchange = renderPages;
+  load("summary.js");
+
+  return {
+    summary: function (data) { summary = data; renderSummary(); show(current); },
+    chunk: function (data) {
+      chunks[data[0]] = data[1];
+      if (data[0] === current) renderChunk(data[1]);
+    }
+  };
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a paginated HTML report of the result log")
+    parser.add_argument("log", nargs="?", default=RESULT_LOG, help=f"result log (default: {RESULT_LOG})")
+    parser.add_argument("-o", "--output", default=REPORT_DIR, help=f"report directory (default: {REPORT_DIR})")
+    parser.add_argument("--since", help="only entries from this time on (e.g. 2024-05-01T09:00)")
+    parser.add_argument("--chunk-size", type=int, default=REPORT_CHUNK_SIZE, help="log entries per page")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep adding entries as they are logged (Ctrl-C to stop)")
+    parser.add_argument("--idle", type=float, help="with --follow, stop after this many quiet seconds")
+    args = parser.parse_args(argv)
+
+    if not args.follow:
+        print(f"Report: {build(args.output, args.log, args.since, args.chunk_size)}")
+        return 0
+
+    writer = ReportWriter(args.output, args.chunk_size)
+    print(f"📄 Following {args.log} into {os.path.join(args.output, 'index.html')}")
+    try:
+        for entry in follow(args.log, args.since, idle=args.idle, on_idle=writer.checkpoint):
+            writer.add(entry)
+    except KeyboardInterrupt:
+        pass
+    print(f"Report: {writer.close()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
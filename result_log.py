@@ -0,0 +1,263 @@
+"""Structured JSON-lines result log, written off the calling thread.
+
+setup() puts a QueueHandler on the root logger; a QueueListener thread
+formats every record and appends it to test_results.jsonl (one JSON object
+per line) and to the plain-text test_results.log. Each append holds an
+flock and the files rotate by size, so the runner, pytest-xdist workers
+and standalone scripts can all write to them at once.
+
+Flows report their steps and what they concluded through step() and
+verdict(); the runner and the pytest hook record each test's one outcome
+through result(). All three attach the structured fields (test, step,
+duration, url, screenshot, outcome); dashboards read those instead of
+grepping for PASSED/FAILED:
+
+    {"time": "...", "level": "INFO", "test": "assign_issue_test", "step": "selected_assignee",
+     "duration": 0.41, "url": "http://localhost/mantis/view.php?id=7", "screenshot": "..."}
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+import waits
+from config import RESULT_LOG, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUPS
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows; appends are still serialized per process
+    fcntl = None
+
+# Structured fields copied from a record's extras into its JSON line
+FIELDS = ("flow", "test", "step", "outcome", "duration", "url", "screenshot")
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+logger = logging.getLogger("results")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                    + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info or record.exc_text:
+            entry["error"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ResultQueueHandler(QueueHandler):
+    """A QueueHandler that keeps the traceback.
+
+    QueueHandler.prepare() folds it into the message and drops exc_info.
+    Here it is formatted into exc_text before the record is queued, and
+    the message stays as it was, so the JSON line gets its `error` field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class SharedFileHandler(logging.Handler):
+    """Appends whole lines to a file that other processes append to as well.
+
+    Every write is a single O_APPEND write under an flock on `<path>.lock`.
+    The holder of the lock rotates the file once it would grow past
+    `max_bytes`; the others notice the new file by its inode and reopen.
+    """
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._fd = None
+        self._inode = None
+        self._lock_fd = None
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.path + ".lock", os.O_WRONLY | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _close_file(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _open(self):
+        """Descriptor of the current file, reopened when another process rotated it"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if self._fd is None or inode != self._inode:
+            self._close_file()
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._inode = os.fstat(self._fd).st_ino
+        return self._fd
+
+    def _rotate(self):
+        self._close_file()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def emit(self, record):
+        try:
+            line = (self.format(record) + "\n").encode("utf-8")
+            with self._locked():
+                fd = self._open()
+                size = os.fstat(fd).st_size
+                if self.max_bytes and size and size + len(line) > self.max_bytes:
+                    self._rotate()
+                    fd = self._open()
+                os.write(fd, line)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self._close_file()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        super().close()
+
+
+_listener = None
+# Process that started _listener: its thread does not survive a fork
+_listener_pid = None
+_setup_lock = threading.Lock()
+
+
+def setup(path=RESULT_LOG, text_path=LOG_FILE, level=logging.INFO, force=False):
+    """Route this process's logging through the background writer.
+
+    Like logging.basicConfig(), does nothing when the root logger already
+    has handlers unless `force` is set. Safe to call more than once, and
+    in a forked child (runner workers), which gets a writer of its own.
+    """
+    global _listener, _listener_pid
+    with _setup_lock:
+        root = logging.getLogger()
+        if _listener is not None and _listener_pid != os.getpid():
+            # Inherited through fork: nothing drains its queue here, and its
+            # lock file is shared with the parent, so flock would not exclude it
+            root.handlers[:] = [h for h in root.handlers if not isinstance(h, ResultQueueHandler)]
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+            force = True
+        if _listener is not None or (root.handlers and not force):
+            return
+        json_handler = SharedFileHandler(path)
+        json_handler.setFormatter(JsonFormatter())
+        text_handler = SharedFileHandler(text_path)
+        text_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+        records = queue.SimpleQueue()
+        _listener = QueueListener(records, json_handler, text_handler)
+        _listener.start()
+        _listener_pid = os.getpid()
+        root.addHandler(ResultQueueHandler(records))
+        root.setLevel(level)
+        atexit.register(stop)
+
+
+def stop():
+    """Write out queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def flush():
+    """Wait until every record logged so far is on disk"""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def fields(**values):
+    """Logging `extra` with only the structured fields that are set"""
+    return {name: value for name, value in values.items() if value is not None}
+
+
+# Start of each test's run and of its latest step, for step/result durations
+_started = {}
+_last_step = {}
+
+
+def step(driver, test_name, step_name, screenshot=None):
+    """Record a flow step, with the page it was on and its screenshot, if any"""
+    now = time.monotonic()
+    _started.setdefault(test_name, now)
+    previous = _last_step.get(test_name)
+    _last_step[test_name] = now
+    message = f"Screenshot saved: {test_name}_{step_name}" if screenshot else f"Step {test_name}_{step_name}"
+    # Asking the browser costs a round-trip per step; only debug logging pays it
+    url = waits.landed_url(driver) if logger.isEnabledFor(logging.DEBUG) else waits.known_url(driver)
+    logger.info(message, extra=fields(
+        test=test_name, step=step_name, screenshot=screenshot, url=url,
+        duration=round(now - previous, 3) if previous is not None else None))
+
+
+def verdict(test_name, passed, message="", **values):
+    """Record what a flow concluded about itself.
+
+    A message, not an outcome: one test can run several flows (a login,
+    then the flow), and its outcome is recorded once by the caller.
+    """
+    _started.pop(test_name, None)
+    _last_step.pop(test_name, None)
+    text = f"Test '{test_name}' {'PASSED' if passed else 'FAILED'}" + (f": {message}" if message else "")
+    logger.log(logging.INFO if passed else logging.ERROR, text, extra=fields(test=test_name, **values))
+
+
+def result(test_name, passed, message="", duration=None, **values):
+    """Record a test's outcome (once per test); duration defaults to the time since its first step"""
+    started = _started.pop(test_name, None)
+    _last_step.pop(test_name, None)
+    if duration is None and started is not None:
+        duration = time.monotonic() - started
+    outcome = "passed" if passed else "failed"
+    text = f"Test '{test_name}' {outcome.upper()}" + (f": {message}" if message else "")
+    logger.log(logging.INFO if passed else logging.ERROR, text, extra=fields(
+        test=test_name, outcome=outcome,
+        duration=round(duration, 3) if duration is not None else None, **values))
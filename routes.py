@@ -0,0 +1,42 @@
+"""URLs of the MantisBT pages the suite visits, built on config.BASE_URL.
+
+Flows open pages directly instead of hunting for the links that lead
+there:
+
+    driver.get(routes.url("view_issue", issue_id=42))
+"""
+import re
+from config import BASE_URL
+
+PAGES = {
+    "login": "login_page.php",
+    "my_view": "my_view_page.php",
+    "account": "account_page.php",
+    "view_issues": "view_all_bug_page.php",
+    "report_issue": "bug_report_page.php",
+    "report_issue_in_project": "bug_report_page.php?project_id={project_id}",
+    "view_issue": "view.php?id={issue_id}",
+    "update_issue": "bug_update_page.php?bug_id={issue_id}",
+    "change_status": "bug_change_status_page.php?id={issue_id}&new_status={status}",
+    "manage_projects": "manage_proj_page.php",
+    "create_project": "manage_proj_create_page.php",
+    "edit_project": "manage_proj_edit_page.php?project_id={project_id}",
+}
+
+ISSUE_ID_RE = re.compile(r"(?:view\.php\?id=|bug_view_page\.php\?bug_id=|bug_id=)(\d+)")
+
+
+def url(page, **params):
+    """Absolute URL of a page in PAGES, e.g. url("view_issue", issue_id=42)"""
+    return f"{BASE_URL}/{PAGES[page].format(**params)}"
+
+
+def on_page(current_url, page):
+    """Whether `current_url` is the given page (query string ignored)"""
+    return PAGES[page].split("?")[0] in current_url
+
+
+def issue_id_from(link):
+    """Issue id in a view/update link, or None"""
+    match = ISSUE_ID_RE.search(link or "")
+    return int(match.group(1)) if match else None
@@ -0,0 +1,296 @@
+import argparse
+import contextlib
+import importlib
+import io
+import logging
+import multiprocessing.util
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import commands
+import flight_recorder
+import locator_stats
+import report
+import result_log
+import session_cache
+import tracing
+import waits
+from browser import browser_rss
+from config import (BASE_URL, WORKERS, HEADLESS, BROWSER_PROFILE, SCREENSHOT_POLICY, TRACE,
+                    TRACE_DIR, COMMAND_BUDGET, REPORT_DIR)
+
+# flow name -> (module, flow function); None means the login itself is the flow
+FLOWS = {
+    "login": ("test_tc01_login", None),
+    "create_project": ("test_tc05_create_project", "create_project"),
+    "report_issue": ("test_tc08_report_issue", "report_issue"),
+    "assign_issue": ("test_tc12_assign_issue", "assign_issue"),
+    "change_status": ("test_tc13_change_status", "change_status"),
+}
+
+# Flows that claim their own issue instead of picking the first one in the UI,
+# and the state they leave it in
+FLOW_ISSUE_STATE = {"assign_issue": "assigned", "change_status": "resolved"}
+
+
+class _FlowTag(logging.Filter):
+    """Tags a worker's log records with the flow it is running"""
+
+    def __init__(self):
+        super().__init__()
+        self.flow = None
+
+    def filter(self, record):
+        if getattr(record, "flow", None) is None:
+            record.flow = self.flow
+        return True
+
+
+_worker_tag = _FlowTag()
+_worker_headless = HEADLESS
+_worker_profile = BROWSER_PROFILE
+_worker_pool = None
+_worker_client = None
+_worker_store = None
+
+
+def _init_worker(headless, profile, screenshot_policy, trace):
+    """Log straight to the shared result log, so report.py --follow sees flows as they run"""
+    global _worker_headless, _worker_profile
+    import screenshots
+    screenshots.set_policy(screenshot_policy)
+    if trace:
+        tracing.enable()
+    _worker_headless = headless
+    _worker_profile = profile
+    result_log.setup()
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(_worker_tag)
+    # atexit does not run in pool workers; multiprocessing finalizers do
+    multiprocessing.util.Finalize(None, result_log.stop, exitpriority=0)
+
+
+def _get_pool():
+    """Start this worker's warm browsers on first use"""
+    global _worker_pool
+    if _worker_pool is None:
+        from driver_pool import DriverPool
+        _worker_pool = DriverPool(headless=_worker_headless, profile=_worker_profile)
+        # atexit does not run in pool workers; multiprocessing finalizers do
+        multiprocessing.util.Finalize(_worker_pool, _worker_pool.close, exitpriority=10)
+    return _worker_pool
+
+
+def _claim_issue():
+    """Claim an unused issue for this worker's next flow"""
+    global _worker_client, _worker_store
+    from fixture_store import FixtureStore, claim_issue
+    from mantis_client import MantisClient
+
+    if _worker_store is None:
+        _worker_store = FixtureStore()
+        _worker_client = MantisClient()
+    return claim_issue(_worker_store, _worker_client)
+
+
+def run_flow(flow_name):
+    """Run one flow on a pooled browser and return its result, output and log"""
+    module_name, func_name = FLOWS[flow_name]
+    _worker_tag.flow = flow_name
+    output = io.StringIO()
+    result = {"flow": flow_name, "passed": False, "error": None, "commands": None,
+              "flow_time": None, "browser_rss": None}
+    start = time.time()
+
+    with contextlib.redirect_stdout(output):
+        kwargs = {}
+        try:
+            module = importlib.import_module(module_name)
+            if flow_name in FLOW_ISSUE_STATE:
+                try:
+                    kwargs["issue_id"] = _claim_issue()
+                    print(f"✓ Claimed issue {kwargs['issue_id']}")
+                except Exception as e:
+                    # The flow falls back to the first issue on View Issues
+                    print(f"⚠ Could not claim an issue: {str(e)}")
+            with _get_pool().session() as driver:
+                try:
+                    if func_name is None:
+                        flow_start = time.time()
+                        with commands.record(flow_name) as stats:
+                            result["passed"] = bool(module.login(driver))
+                        result["flow_time"] = time.time() - flow_start
+                        result["commands"] = stats.to_dict()
+                    elif session_cache.ensure_logged_in(driver, module.login):
+                        # Only the flow itself counts; a cached or fresh login would skew it
+                        flow_start = time.time()
+                        with commands.record(flow_name) as stats:
+                            result["passed"] = bool(getattr(module, func_name)(driver, **kwargs))
+                        result["flow_time"] = time.time() - flow_start
+                        result["commands"] = stats.to_dict()
+                except Exception as e:
+                    # The pool resets the browser on release, so capture it first
+                    result["url"] = waits.landed_url(driver)
+                    flight_recorder.dump(driver, flow_name, reason=str(e))
+                    raise
+                if not result["passed"]:
+                    result["url"] = waits.landed_url(driver)
+                    flight_recorder.dump(driver, flow_name, reason="flow failed")
+                result["browser_rss"] = browser_rss(driver)
+        except Exception as e:
+            result["error"] = str(e)
+            print(f"❌ {flow_name} failed: {str(e)}")
+        finally:
+            locator_stats.flush()
+            if "issue_id" in kwargs:
+                state = FLOW_ISSUE_STATE[flow_name] if result["passed"] else None
+                _worker_store.release("issue", kwargs["issue_id"], state=state)
+
+    result["duration"] = time.time() - start
+    result["output"] = output.getvalue()
+    result["trace"] = tracing.drain()
+    log_outcome(result)
+    # On disk before the parent hears about it, so the outcome never trails the report
+    result_log.flush()
+    return result
+
+
+def log_outcome(result):
+    """Record a flow's one outcome in the shared result log"""
+    result_log.result(result["flow"], result["passed"], result["error"] or "",
+                      duration=result["duration"], flow=result["flow"], url=result.get("url"))
+
+
+def write_trace(results, path=None):
+    """Merge the workers' trace events into one file, one process row per worker"""
+    events = []
+    for pid in sorted({event["pid"] for r in results for event in r.get("trace", [])}):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                       "args": {"name": f"worker {pid}"}})
+    for result in results:
+        events.extend(result.get("trace", []))
+    path = path or os.path.join(TRACE_DIR, f"run-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    return tracing.write_events(events, path)
+
+
+def run_suite(flows, workers=WORKERS, headless=HEADLESS, profile=BROWSER_PROFILE,
+              screenshot_policy=SCREENSHOT_POLICY, trace=TRACE):
+    """Schedule flows across a pool of worker processes"""
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(headless, profile, screenshot_policy, trace)) as pool:
+        futures = {pool.submit(run_flow, flow): flow for flow in flows}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker died before it could log the outcome itself
+                result = {"flow": futures[future], "passed": False, "error": str(e),
+                          "duration": 0.0, "output": "", "trace": []}
+                log_outcome(result)
+            status = "✅ PASSED" if result["passed"] else "❌ FAILED"
+            print(f"{status} {result['flow']} ({result['duration']:.1f}s)")
+            results.append(result)
+
+    # Keep the merged output in the requested order rather than completion order
+    results.sort(key=lambda r: flows.index(r["flow"]))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run MantisBT flows in parallel")
+    parser.add_argument("flows", nargs="*", default=list(FLOWS),
+                        help=f"flows to run (default: all of {', '.join(FLOWS)})")
+    parser.add_argument("-n", "--workers", type=int, default=WORKERS,
+                        help="number of worker processes")
+    parser.add_argument("--headed", action="store_true",
+                        help="show the browser windows")
+    parser.add_argument("--browser", default=BROWSER_PROFILE, choices=("lean", "full", "debug"),
+                        help="browser profile (see browser.PROFILES)")
+    parser.add_argument("--screenshots", default=SCREENSHOT_POLICY,
+                        choices=("off", "failure-only", "keyframes", "full"),
+                        help="which steps get a screenshot")
+    parser.add_argument("--trace", action="store_true", default=TRACE,
+                        help=f"write a Chrome trace-event profile of the run to {TRACE_DIR}/")
+    parser.add_argument("--command-budget", nargs="?", const=COMMAND_BUDGET, metavar="PATH",
+                        help=f"fail when a flow sends more WebDriver commands than budgeted "
+                             f"(default file: {COMMAND_BUDGET})")
+    parser.add_argument("--update-budget", action="store_true",
+                        help="save this run's command counts as the new budget")
+    parser.add_argument("--report", nargs="?", const=REPORT_DIR, metavar="DIR",
+                        help=f"write a paginated HTML report of this run (default: {REPORT_DIR}/)")
+    parser.add_argument("--reset-data", action="store_true",
+                        help="reset the stand-in MantisBT (mantis_standin.py) before the run")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="print each flow's output")
+    args = parser.parse_args(argv)
+
+    unknown = [flow for flow in args.flows if flow not in FLOWS]
+    if unknown:
+        parser.error(f"unknown flow(s): {', '.join(unknown)}")
+
+    result_log.setup()
+
+    print("="*60)
+    print(f"MANTISBT SELENIUM SUITE - {len(args.flows)} flows on {args.workers} workers")
+    print("="*60)
+
+    if args.reset_data:
+        import mantis_standin
+        from fixture_store import FixtureStore
+        mantis_standin.reset(BASE_URL)
+        FixtureStore().clear()
+        print(f"✓ Reset the stand-in at {BASE_URL}")
+
+    started = report.now()
+    start = time.time()
+    results = run_suite(args.flows, workers=args.workers,
+                        headless=False if args.headed else HEADLESS, profile=args.browser,
+                        screenshot_policy=args.screenshots, trace=args.trace)
+    elapsed = time.time() - start
+    if args.trace:
+        print(f"Trace: {write_trace(results)}")
+    if args.report:
+        result_log.flush()
+        print(f"Report: {report.build(args.report, since=started)}")
+
+    command_stats = commands.merge([r["commands"] for r in results if r.get("commands")])
+    violations = []
+    if command_stats:
+        print(f"Command histogram: {commands.write_histogram(command_stats)}")
+        if args.verbose:
+            commands.print_summary(command_stats)
+        budget_path = args.command_budget or COMMAND_BUDGET
+        if args.update_budget:
+            commands.write_budget(command_stats, budget_path)
+            print(f"Command budget updated: {budget_path}")
+        elif args.command_budget:
+            budget = commands.read_budget(budget_path)
+            if budget is None:
+                print(f"⚠ No command budget at {budget_path}; create it with --update-budget")
+            else:
+                violations = commands.check_budget(command_stats, budget)
+                for violation in violations:
+                    print(f"❌ Command budget exceeded - {violation}")
+                    logging.error(f"Command budget exceeded - {violation}")
+
+    if args.verbose:
+        for result in results:
+            print("\n" + "-"*60)
+            print(f"{result['flow']}:")
+            print(result["output"])
+
+    passed = sum(1 for r in results if r["passed"])
+    serial = sum(r["duration"] for r in results)
+    print("\n" + "="*60)
+    print(f"{passed}/{len(results)} flows passed in {elapsed:.1f}s "
+          f"(serial time {serial:.1f}s)")
+    print("="*60)
+    logging.info(f"Suite finished: {passed}/{len(results)} passed in {elapsed:.1f}s")
+
+    return 0 if passed == len(results) and not violations else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
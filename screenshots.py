@@ -0,0 +1,289 @@
+import glob
+import hashlib
+import io
+import itertools
+import json
+import logging
+import multiprocessing.util
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import tracing
+from config import (SCREENSHOT_DIR, SCREENSHOT_FORMAT, SCREENSHOT_QUALITY,
+                    SCREENSHOT_MAX_WIDTH, SCREENSHOT_BUDGET_MB, SCREENSHOT_WORKERS,
+                    SCREENSHOT_POLICY)
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it screenshots stay PNG
+    Image = None
+
+EXTENSIONS = {"png": "png", "webp": "webp", "jpeg": "jpg"}
+
+# Screenshot policy levels, from cheapest to most verbose
+POLICIES = ("off", "failure-only", "keyframes", "full")
+
+# Step names the flows use for failed and finished states
+FAILURE_MARKERS = ("fail", "error", "not_found", "not_confirmed", "uncertain", "not_on_")
+FINAL_MARKERS = ("success", "successful", "in_list", "already_logged_in")
+
+
+def run_of(capture_id):
+    """Run a capture id (`<run>-<sequence>-<test>_<step>`) belongs to"""
+    return "-".join(capture_id.split("-", 3)[:3])
+
+
+def manifest_path(run, folder=SCREENSHOT_DIR):
+    """Manifest of one run's captures"""
+    return os.path.join(folder, "manifests", f"{run}.jsonl")
+
+
+class ScreenshotService:
+    """Captures screenshots in memory and writes them from a thread pool.
+
+    The browser thread only pays for get_screenshot_as_png(); decoding,
+    downscaling, lossy encoding and the disk write happen in the
+    background. Once `budget_mb` has been written further frames are
+    dropped with a warning.
+
+    Storage is content-addressed: each distinct frame is written once to
+    `blobs/<sha256 of the PNG>.<ext>`, so only pixel-identical frames
+    share a blob, from this run or an earlier one. Every capture appends
+    a line to its run's manifest (`manifests/<run>.jsonl`) mapping its
+    capture id (`<run>-<sequence>-<test>_<step>`) to a blob.
+    """
+
+    def __init__(self, folder=SCREENSHOT_DIR, fmt=SCREENSHOT_FORMAT, quality=SCREENSHOT_QUALITY,
+                 max_width=SCREENSHOT_MAX_WIDTH, budget_mb=SCREENSHOT_BUDGET_MB,
+                 workers=SCREENSHOT_WORKERS):
+        if fmt not in EXTENSIONS:
+            raise ValueError(f"Unsupported screenshot format: {fmt}")
+        if fmt != "png" and Image is None:
+            logging.warning(f"Pillow is not installed; saving PNG instead of {fmt}")
+            fmt = "png"
+
+        self.folder = folder
+        self.blob_folder = os.path.join(folder, "blobs")
+        self.fmt = fmt
+        self.quality = quality
+        self.max_width = max_width
+        self.budget = int(budget_mb * 1024 * 1024) if budget_mb else None
+        self.run = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.manifest_path = manifest_path(self.run, folder)
+        self._sequence = itertools.count(1)
+        self.bytes_written = 0
+        self.dropped = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screenshot")
+        os.makedirs(self.blob_folder, exist_ok=True)
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        # Blobs this process has seen; others (earlier runs, other workers) are found on disk
+        self._blobs = set()
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_folder, f"{digest}.{EXTENSIONS[self.fmt]}")
+
+    def capture(self, driver, name):
+        """Grab the current frame and queue it for writing; returns its capture id"""
+        png = driver.get_screenshot_as_png()
+        capture_id = f"{self.run}-{next(self._sequence):05d}-{name}"
+        future = self._executor.submit(self._write, png, name, capture_id)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(future)
+        return capture_id
+
+    def encode(self, png):
+        """Downscale and re-encode a PNG according to the configured format"""
+        if Image is None or (self.fmt == "png" and not self.max_width):
+            return png
+
+        image = Image.open(io.BytesIO(png))
+        if self.max_width and image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height), Image.LANCZOS)
+
+        out = io.BytesIO()
+        if self.fmt == "jpeg":
+            image.convert("RGB").save(out, "JPEG", quality=self.quality, optimize=True)
+        elif self.fmt == "webp":
+            image.save(out, "WEBP", quality=self.quality, method=4)
+        else:
+            image.save(out, "PNG", optimize=True)
+        return out.getvalue()
+
+    def _has_blob(self, digest):
+        """Whether this frame is stored already, by this process or another"""
+        if digest not in self._blobs and os.path.exists(self.blob_path(digest)):
+            self._blobs.add(digest)
+        return digest in self._blobs
+
+    def _write(self, png, name, capture_id):
+        # Identical pixels give identical PNG bytes, so duplicates skip the decode
+        digest = hashlib.sha256(png).hexdigest()[:32]
+        with self._lock:
+            duplicate = self._has_blob(digest)
+        data = None
+        if not duplicate:
+            try:
+                data = self.encode(png)
+            except Exception as e:
+                logging.error(f"Could not encode screenshot {name}: {str(e)}")
+                return None
+
+        with self._lock:
+            # Another thread may have stored the same frame meanwhile
+            if not duplicate and digest in self._blobs:
+                duplicate, data = True, None
+            if duplicate:
+                self.deduplicated += 1
+            elif self.budget is not None and self.bytes_written + len(data) > self.budget:
+                self.dropped += 1
+                logging.warning(f"Screenshot budget exhausted, dropped {name}")
+                return None
+            else:
+                self._blobs.add(digest)
+                self.bytes_written += len(data)
+
+        path = self.blob_path(digest)
+        if data is not None:
+            # Write under a temporary name: other workers take an existing blob as complete
+            temp = f"{path}.{os.getpid()}.tmp"
+            with open(temp, "wb") as f:
+                f.write(data)
+            os.replace(temp, path)
+
+        entry = {"id": capture_id, "name": name, "run": self.run,
+                 "blob": os.path.relpath(path, self.folder), "duplicate": data is None,
+                 "time": time.time()}
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return path
+
+    def flush(self):
+        """Wait for every queued screenshot to be written"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+        if self.deduplicated:
+            logging.info(f"{self.deduplicated} screenshots were identical to a stored frame")
+        if self.dropped:
+            logging.warning(f"{self.dropped} screenshots dropped by the size budget")
+
+
+def resolve(key, folder=SCREENSHOT_DIR):
+    """Blob path of a capture id, or of the latest capture of a `<test>_<step>` name.
+
+    A capture id is looked up in its own run's manifest; a name is looked
+    up in the newest run that has it.
+    """
+    if key.count("-") >= 3:
+        manifests = [manifest_path(run_of(key), folder)]
+    else:
+        manifests = sorted(glob.glob(manifest_path("*", folder)), key=os.path.getmtime, reverse=True)
+    for manifest in manifests:
+        path = None
+        if os.path.exists(manifest):
+            with open(manifest, encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if key in (entry["id"], entry["name"]):
+                        path = os.path.join(folder, entry["blob"])
+        if path:
+            return path
+    return None
+
+
+def is_failure_step(step_name):
+    return step_name.startswith("no_") or any(m in step_name for m in FAILURE_MARKERS)
+
+
+def is_final_step(step_name):
+    return any(m in step_name for m in FINAL_MARKERS)
+
+
+class ScreenshotPolicy:
+    """Decides which steps get a screenshot.
+
+    off           nothing
+    failure-only  steps that record a failure
+    keyframes     the first step of each test, its final step and failures
+    full          every step
+    """
+
+    def __init__(self, level=SCREENSHOT_POLICY):
+        if level not in POLICIES:
+            raise ValueError(f"Unknown screenshot policy '{level}', expected one of {POLICIES}")
+        self.level = level
+        self._started = set()
+        self._lock = threading.Lock()
+
+    def wants(self, test_name, step_name):
+        if self.level == "off":
+            return False
+        if self.level == "full":
+            return True
+
+        failed = is_failure_step(step_name) or test_name == "final"
+        if self.level == "failure-only":
+            return failed
+
+        final = failed or is_final_step(step_name)
+        with self._lock:
+            first = test_name not in self._started
+            # A finished test starts over, so its next run gets a first frame again
+            if final:
+                self._started.discard(test_name)
+            else:
+                self._started.add(test_name)
+        return first or final
+
+
+policy = ScreenshotPolicy()
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """The process-wide screenshot service, created on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ScreenshotService()
+            # Runs at interpreter exit and at runner worker shutdown alike
+            multiprocessing.util.Finalize(None, _service.close, exitpriority=20)
+        return _service
+
+
+def set_policy(level):
+    """Switch the screenshot policy for this process"""
+    global policy
+    policy = ScreenshotPolicy(level)
+
+
+def capture(driver, test_name, step_name):
+    """Queue a screenshot of the current page if the policy wants this step.
+
+    Returns the capture id (see resolve()), or None when the step is
+    skipped; skipped steps never touch the browser.
+    """
+    # Every screenshot step also marks the end of a phase in the trace
+    tracing.phase(step_name, test=test_name)
+    if not policy.wants(test_name, step_name):
+        return None
+    with tracing.step("screenshot", "screenshot", name=f"{test_name}_{step_name}"):
+        return get_service().capture(driver, f"{test_name}_{step_name}")
+
+
+def flush():
+    if _service is not None:
+        _service.flush()
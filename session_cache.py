@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from selenium.common.exceptions import WebDriverException
+import routes
+import tracing
+from config import BASE_URL
+
+# Cookies that carry an authenticated MantisBT session
+SESSION_COOKIES = ("MANTIS_STRING_COOKIE", "PHPSESSID")
+
+# Light authenticated page for the session probe: MantisBT redirects anonymous
+# users to login from it, and it renders none of My View's issue lists
+PROBE_URL = routes.url("account")
+
+_cookies = None
+_lock = threading.Lock()
+
+
+def capture_session(driver):
+    """Return the session cookies of a logged-in browser"""
+    return [c for c in driver.get_cookies() if c["name"] in SESSION_COOKIES]
+
+
+def _expired(cookies):
+    now = time.time()
+    return any(c.get("expiry") and c["expiry"] <= now for c in cookies)
+
+
+def inject_session(driver, cookies):
+    """Put captured session cookies into a fresh browser"""
+    try:
+        # CDP can set cookies for any URL without loading a page first
+        for cookie in cookies:
+            params = {k: cookie[k] for k in ("name", "value", "path", "secure", "httpOnly")
+                      if k in cookie}
+            params["url"] = BASE_URL
+            if cookie.get("expiry"):
+                params["expires"] = cookie["expiry"]
+            driver.execute_cdp_cmd("Network.setCookie", params)
+    except (WebDriverException, AttributeError):
+        # WebDriver only accepts cookies for the domain currently loaded
+        driver.get(routes.url("login"))
+        for cookie in cookies:
+            driver.add_cookie({k: v for k, v in cookie.items() if k != "sameSite"})
+
+
+def probe_session(driver):
+    """Load the account page once; MantisBT bounces anonymous users to login"""
+    driver.get(PROBE_URL)
+    return not routes.on_page(driver.current_url, "login")
+
+
+@tracing.traced(cat="step")
+def ensure_logged_in(driver, login):
+    """Log a browser in, reusing this worker's session when it is still valid.
+
+    `login` is one of the scripts' UI `login(driver)` helpers; it only runs
+    when there is no cached session or the cached cookie has expired.
+    """
+    global _cookies
+
+    with _lock:
+        cookies = _cookies
+
+    if cookies and not _expired(cookies):
+        inject_session(driver, cookies)
+        if probe_session(driver):
+            logging.info("Session cache: reused cached login")
+            print("✓ Reused cached login session")
+            return True
+        logging.info("Session cache: cached session rejected, logging in again")
+
+    if not login(driver):
+        return False
+
+    cookies = capture_session(driver)
+    with _lock:
+        _cookies = cookies or None
+    logging.info(f"Session cache: captured {len(cookies)} session cookies")
+    return True
+
+
+def clear():
+    """Forget the cached session"""
+    global _cookies
+    with _lock:
+        _cookies = None
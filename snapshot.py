@@ -0,0 +1,62 @@
+import tracing
+
+SNAPSHOT_JS = """
+function field(el) {
+    return {tag: el.tagName.toLowerCase(), type: el.type || '', name: el.name || '',
+            id: el.id || '', value: el.type === 'password' ? '' : (el.value || '')};
+}
+
+var forms = Array.from(document.forms).map(function (form) {
+    return {action: form.getAttribute('action') || '', method: form.method || '',
+            fields: Array.from(form.elements).filter(function (el) { return el.name || el.type === 'submit'; })
+                                             .map(field)};
+});
+
+var messages = Array.from(document.querySelectorAll('.alert, .success-msg, .error-msg, p.bold'))
+    .map(function (el) { return el.innerText.trim(); })
+    .filter(function (text) { return text; });
+
+return {
+    url: location.href,
+    title: document.title,
+    text: document.body ? document.body.innerText : '',
+    html_length: document.documentElement.outerHTML.length,
+    ready_state: document.readyState,
+    forms: forms,
+    inputs: document.getElementsByTagName('input').length,
+    messages: messages
+};
+"""
+
+
+def page_snapshot(driver):
+    """Collect URL, title, visible text, form fields and banner messages in one call.
+
+    Use the returned dict for every check on a page instead of separate
+    current_url / title / page_source / find_element round-trips.
+    """
+    with tracing.step("page_snapshot", "locate"):
+        return driver.execute_script(SNAPSHOT_JS)
+
+
+def form_fields(snapshot):
+    """All fields of all forms in a snapshot"""
+    return [f for form in snapshot["forms"] for f in form["fields"]]
+
+
+def debug_page_state(driver, location="unknown"):
+    """Debug function to print current page state"""
+    snapshot = page_snapshot(driver)
+    fields = form_fields(snapshot)
+
+    print(f"\n🔍 DEBUG at {location}:")
+    print(f"  URL: {snapshot['url']}")
+    print(f"  Title: {snapshot['title']}")
+    print(f"  Page source length: {snapshot['html_length']} characters")
+    print(f"  username field: {sum(1 for f in fields if f['name'] == 'username')} found")
+    print(f"  login button: {sum(1 for f in fields if f['type'] == 'submit')} found")
+    print(f"  any form: {len(snapshot['forms'])} found")
+    print(f"  any input: {snapshot['inputs']} found")
+    for message in snapshot["messages"]:
+        print(f"  message: {message}")
+    return snapshot
@@ -1,93 +1,62 @@
-import os
-import logging
+from functools import partial
 import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from browser import create_driver
+from snapshot import page_snapshot
+from waits import document_ready, success_banner, wait_for
+import routes
+from pages import LoginPage, ManageProjectCreatePage
+import flight_recorder
+import result_log
+import screenshots
+import tracing
 from config import USERNAME, PASSWORD
 
 # Setup logging
-log_file = "test_results.log"
-logging.basicConfig(filename=log_file, level=logging.INFO, 
-                    format="%(asctime)s - %(levelname)s - %(message)s")
-
-# Create screenshots folder
-screenshots_folder = "screenshots"
-os.makedirs(screenshots_folder, exist_ok=True)
+result_log.setup()
 
 def take_screenshot(driver, test_name, step_name):
     """Take screenshot and log it"""
-    screenshot_path = os.path.join(screenshots_folder, f"{test_name}_{step_name}.png")
-    driver.save_screenshot(screenshot_path)
-    logging.info(f"Screenshot saved for {step_name}: {screenshot_path}")
-    print(f"📸 Screenshot: {step_name}")
+    flight_recorder.record(driver, test_name, step_name)
+    screenshot_path = screenshots.capture(driver, test_name, step_name)
+    result_log.step(driver, test_name, step_name, screenshot_path)
+    if screenshot_path:
+        print(f"📸 Screenshot: {step_name}")
     return screenshot_path
 
 def log_test_result(test_name, result, message=""):
     """Log test result"""
     if result:
-        logging.info(f"Test '{test_name}' PASSED: {message}")
+        result_log.verdict(test_name, True, message)
         print(f"✅ Test '{test_name}' PASSED: {message}")
     else:
-        logging.error(f"Test '{test_name}' FAILED: {message}")
+        result_log.verdict(test_name, False, message)
         print(f"❌ Test '{test_name}' FAILED: {message}")
 
 def wait_for_page_load(driver, timeout=30):
     """Wait for page to load completely"""
     try:
-        WebDriverWait(driver, timeout).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
-        )
+        wait_for(driver, document_ready(), timeout)
     except:
         pass
-    time.sleep(1)  # Small buffer
 
+@tracing.traced()
 def login(driver):
     """Login to MantisBT"""
     test_name = "login_test"
     try:
         print("🔐 Starting login...")
-        driver.get("http://localhost/mantis/login_page.php")
-        wait_for_page_load(driver)
-        
-        # Enter username and click to password page
-        username_field = WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.NAME, "username"))
-        )
-        username_field.send_keys(USERNAME)
-        take_screenshot(driver, test_name, "entered_username")
-        
-        driver.find_element(By.CSS_SELECTOR, "input[type='submit']").click()
-        wait_for_page_load(driver)
-        
-        # Enter password and submit
-        password_field = WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.NAME, "password"))
-        )
-        password_field.send_keys(PASSWORD)
-        take_screenshot(driver, test_name, "entered_password")
-        
-        driver.find_element(By.CSS_SELECTOR, "input[type='submit']").click()
-        wait_for_page_load(driver)
-        
-        # Verify login success
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.PARTIAL_LINK_TEXT, "My View"))
-        )
-        
-        take_screenshot(driver, test_name, "login_success")
+        LoginPage(driver).open().login(USERNAME, PASSWORD, partial(take_screenshot, driver, test_name))
         print("✅ Login successful")
         log_test_result(test_name, True, "Login successful")
         return True
         
     except Exception as e:
         take_screenshot(driver, test_name, "login_failed")
+        print(f"❌ Login failed: {str(e)}")
         log_test_result(test_name, False, f"Login failed: {str(e)}")
         raise
 
+@tracing.traced()
 def create_project(driver):
     """Create a new project in MantisBT"""
     test_name = "create_project_test"
@@ -98,53 +67,42 @@ def create_project(driver):
         
         # Step 1: Navigate directly to create project page
         print("📍 Navigating to Create Project page...")
-        driver.get("http://localhost/mantis/manage_proj_create_page.php")
+        page = ManageProjectCreatePage(driver).open()
         wait_for_page_load(driver)
         
         take_screenshot(driver, test_name, "create_form_page")
         
         # Step 2: Verify we're on create project form
         print("📋 Verifying create project form...")
-        
-        # Wait for form to load - based on your output, it has 6 inputs, 2 dropdowns, 1 textarea
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.NAME, "name"))
-        )
+        page.wait_for("name")
         
         # Step 3: Fill the project form
         print("📝 Filling project details...")
         
         # Fill project name
-        name_field = driver.find_element(By.NAME, "name")
-        name_field.clear()
-        name_field.send_keys(project_name)
+        page.fill("name", project_name)
         print(f"✓ Project name filled: {project_name}")
         take_screenshot(driver, test_name, "filled_project_name")
         
         # Fill status (development)
-        status_select = driver.find_element(By.NAME, "status")
-        from selenium.webdriver.support.ui import Select
-        Select(status_select).select_by_visible_text("development")
+        page.select("status").select_by_visible_text("development")
         print("✓ Status selected: development")
         
         # Fill view state (public)
-        view_state_select = driver.find_element(By.NAME, "view_state")
-        Select(view_state_select).select_by_visible_text("public")
+        page.select("view_state").select_by_visible_text("public")
         print("✓ View state selected: public")
         
         # Handle inherit global categories (optional - skip if not found)
-        try:
-            inherit_checkbox = driver.find_element(By.NAME, "inherit_global")
+        inherit_checkbox = page.find("inherit_global")
+        if inherit_checkbox:
             if not inherit_checkbox.is_selected():
                 inherit_checkbox.click()
             print("✓ Inherit global categories checked")
-        except:
+        else:
             print("⚠ Inherit global categories checkbox not found (skipping)")
         
         # Fill description
-        desc_field = driver.find_element(By.NAME, "description")
-        desc_field.clear()
-        desc_field.send_keys("This is a test project created for Selenium automation.")
+        page.fill("description", "This is a test project created for Selenium automation.")
         print("✓ Description filled")
         
         take_screenshot(driver, test_name, "form_filled")
@@ -152,16 +110,10 @@ def create_project(driver):
         # Step 4: Submit the form
         print("📤 Submitting form...")
         
-        # Find and click submit button
-        submit_button = WebDriverWait(driver, 30).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "input[type='submit'][value='Add Project']"))
-        )
-        submit_button.click()
+        # Done once the result page loads or MantisBT shows its success banner
+        page.submit(until=success_banner())
         print("✅ Form submitted")
         
-        wait_for_page_load(driver)
-        time.sleep(3)  # Wait for processing
-        
         # Step 5: Verify success
         take_screenshot(driver, test_name, "after_submit")
         
@@ -169,18 +121,16 @@ def create_project(driver):
         success = False
         success_message = ""
         
-        # Check current URL
-        current_url = driver.current_url
+        # Check current URL and page content in one round-trip
+        snapshot = page_snapshot(driver)
+        current_url = snapshot["url"]
+        page_text = snapshot["text"]
         print(f"Current URL after submit: {current_url}")
         
-        # Check page content
-        page_source = driver.page_source
-        page_text = driver.find_element(By.TAG_NAME, "body").text
-        
         # Success indicators (checking each one)
         success_indicators = [
-            ("Operation successful", "Operation successful message found"),
-            ("Project created successfully", "Project created message found"),
+            ("Operation successful" in page_text, "Operation successful message found"),
+            ("Project created successfully" in page_text, "Project created message found"),
             ("manage_proj_page.php" in current_url, "On manage projects page"),
             ("view_all_set.php" in current_url, "On view all set page"),
             (project_name in page_text, f"Project name '{project_name}' found on page"),
@@ -198,10 +148,10 @@ def create_project(driver):
             
             # Additional verification: Check if project appears in projects list
             try:
-                driver.get("http://localhost/mantis/manage_proj_page.php")
+                driver.get(routes.url("manage_projects"))
                 wait_for_page_load(driver)
                 
-                if project_name in driver.page_source:
+                if project_name in page_snapshot(driver)["text"]:
                     print(f"✅ Verified: Project '{project_name}' found in projects list")
                     take_screenshot(driver, test_name, "project_in_list")
                 else:
@@ -238,6 +188,9 @@ def create_project(driver):
         log_test_result(test_name, False, error_msg)
         raise
 
+def test_create_project(logged_in_driver):
+    assert create_project(logged_in_driver), "Project was not created"
+
 def run_test():
     """Main test execution"""
     print("="*60)
@@ -245,18 +198,8 @@ def run_test():
     print("="*60)
     
     # Setup WebDriver with options
-    options = webdriver.ChromeOptions()
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    
-    # Uncomment for headless mode
-    # options.add_argument("--headless=new")
-    
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
-    )
+    # Headless unless MANTIS_BROWSER=debug
+    driver = create_driver()
     
     try:
         # Run login test
@@ -285,8 +228,6 @@ def run_test():
         take_screenshot(driver, "final", "test_failure")
         
     finally:
-        # Small delay before closing
-        time.sleep(2)
         print("\nClosing browser...")
         driver.quit()
 
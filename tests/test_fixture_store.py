@@ -0,0 +1,108 @@
+"""FixtureStore claims: every caller gets its own fixture, and claims expire"""
+import threading
+import time
+import pytest
+from config import FIXTURE_PROJECT
+from fixture_store import FixtureStore, claim_issue
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FixtureStore(path=str(tmp_path / "fixtures.sqlite3"), server="http://mantis.test")
+
+
+def test_claims_are_distinct(store):
+    for issue_id in (1, 2):
+        store.record("issue", issue_id)
+
+    first = store.claim("issue")
+    second = store.claim("issue")
+
+    assert {first["mantis_id"], second["mantis_id"]} == {1, 2}
+    assert store.claim("issue") is None
+
+
+def test_concurrent_claims_never_share_a_fixture(store):
+    for issue_id in range(1, 9):
+        store.record("issue", issue_id)
+    claimed = []
+
+    def claim():
+        issue = FixtureStore(path=store.path, server=store.server).claim("issue")
+        claimed.append(issue["mantis_id"] if issue else None)
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == list(range(1, 9))
+
+
+def test_release_moves_the_fixture_to_its_new_state(store):
+    store.record("issue", 7)
+    store.claim("issue")
+
+    store.release("issue", 7, state="assigned")
+
+    assert store.claim("issue", state="new") is None
+    assert store.claim("issue", state="assigned")["mantis_id"] == 7
+
+
+def test_release_without_state_makes_it_claimable_again(store):
+    store.record("issue", 7)
+    store.claim("issue")
+
+    store.release("issue", 7)
+
+    assert store.claim("issue")["mantis_id"] == 7
+
+
+def test_claims_of_crashed_workers_expire(tmp_path):
+    store = FixtureStore(path=str(tmp_path / "fixtures.sqlite3"), server="http://mantis.test",
+                         claim_timeout=0.05)
+    store.record("issue", 7)
+    assert store.claim("issue") is not None
+    assert store.claim("issue") is None
+
+    time.sleep(0.1)
+
+    assert store.claim("issue")["mantis_id"] == 7
+
+
+def test_servers_do_not_share_fixtures(store):
+    other = FixtureStore(path=store.path, server="http://other.test")
+    store.record("issue", 7)
+
+    assert other.claim("issue") is None
+    assert store.claim("issue")["mantis_id"] == 7
+
+
+class FakeClient:
+    def __init__(self):
+        self.reported = []
+
+    def find_project(self, name):
+        return None
+
+    def create_project(self, name):
+        return 3
+
+    def report_issue(self, project_id):
+        self.reported.append(project_id)
+        return 100 + len(self.reported)
+
+
+def test_claim_issue_reports_a_new_issue_only_when_none_is_free(store):
+    client = FakeClient()
+    store.record("issue", 7)
+
+    assert claim_issue(store, client) == 7
+    assert client.reported == []
+
+    # None left: a fresh one is reported, already claimed by this worker
+    assert claim_issue(store, client) == 101
+    assert client.reported == [3]
+    assert store.claim("issue") is None
+    assert store.find("project", FIXTURE_PROJECT)["mantis_id"] == 3
@@ -0,0 +1,68 @@
+"""Report summary: one count per test outcome, across rotated log files"""
+import json
+import logging
+import pytest
+import report
+import result_log
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    """Send the results logger to a small, rotating JSON log in a scratch directory"""
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "results.jsonl")
+    handler = result_log.SharedFileHandler(path, max_bytes=2000, backups=10)
+    handler.setFormatter(result_log.JsonFormatter())
+    monkeypatch.setattr(result_log.logger, "handlers", [handler])
+    monkeypatch.setattr(result_log.logger, "propagate", False)
+    yield path
+    handler.close()
+
+
+def summary(out_dir):
+    with open(out_dir / "data" / "summary.js", encoding="utf-8") as f:
+        text = f.read()
+    return json.loads(text[len("mantisReport.summary("):-len(");\n")])
+
+
+class FakeDriver:
+    """Steps only look up the driver's last known URL, which it has none of"""
+
+
+def run_assign_issue(driver, passed):
+    """What one pytest test of the assign flow logs: login and flow verdicts, steps, one outcome"""
+    result_log.verdict("login_test", True, "Login successful")
+    result_log.step(driver, "assign_issue_test", "issue_details_page")
+    result_log.verdict("assign_issue_test", passed)
+    result_log.result("test_assign_issue", passed, "" if passed else "AssertionError", duration=2.0)
+
+
+def test_summary_counts_one_outcome_per_test(tmp_path, log_path):
+    driver = FakeDriver()
+    for passed in (True, True, False):
+        run_assign_issue(driver, passed)
+    logging.getLogger("results").warning("Screenshot budget exhausted")
+
+    report.build(str(tmp_path / "report"), path=log_path)
+    data = summary(tmp_path / "report")
+
+    assert data["outcomes"] == {"passed": 2, "failed": 1}
+    assert list(data["tests"]) == ["test_assign_issue"]
+    assert data["tests"]["test_assign_issue"]["runs"] == 3
+    assert data["tests"]["test_assign_issue"]["failed"] == 1
+    assert data["tests"]["test_assign_issue"]["last"]["outcome"] == "failed"
+    assert data["finished"]
+
+
+def test_summary_reads_rotated_log_files(tmp_path, log_path):
+    driver = FakeDriver()
+    for _ in range(20):
+        run_assign_issue(driver, True)
+
+    assert len(report.log_files(log_path)) > 1
+    report.build(str(tmp_path / "report"), path=log_path, chunk_size=10)
+    data = summary(tmp_path / "report")
+
+    assert data["outcomes"] == {"passed": 20, "failed": 0}
+    assert data["entries"] == 20 * 4
+    assert sum(chunk["entries"] for chunk in data["chunks"]) == data["entries"]
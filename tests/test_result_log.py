@@ -0,0 +1,93 @@
+"""The shared log files: rotation, reopening after another writer rotated, tracebacks"""
+import json
+import logging
+import os
+import sys
+import pytest
+import result_log
+from result_log import JsonFormatter, ResultQueueHandler, SharedFileHandler
+
+
+def record(message, exc_info=None):
+    return logging.LogRecord("results", logging.INFO, __file__, 1, message, None, exc_info)
+
+
+def handler(path, **kwargs):
+    h = SharedFileHandler(str(path), **kwargs)
+    h.setFormatter(logging.Formatter("%(message)s"))
+    return h
+
+
+def lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_rotates_by_size_and_keeps_the_configured_backups(tmp_path):
+    path = tmp_path / "results.log"
+    h = handler(path, max_bytes=100, backups=2)
+    for i in range(30):
+        h.emit(record(f"line {i:02d} " + "x" * 20))
+    h.close()
+
+    assert os.path.exists(f"{path}.1") and os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+    for name in (path, f"{path}.1", f"{path}.2"):
+        assert os.path.getsize(name) <= 100
+        # Whole lines only: a record is never split across files
+        assert all(line.startswith("line ") and line.endswith("x" * 20) for line in lines(name))
+    # The newest records are in the current file, the ones before in .1
+    assert lines(path)[-1].startswith("line 29")
+    assert int(lines(f"{path}.1")[-1][5:7]) == int(lines(path)[0][5:7]) - 1
+
+
+def test_reopens_the_file_another_writer_rotated(tmp_path):
+    path = tmp_path / "results.log"
+    small = handler(path, max_bytes=60, backups=1)
+    other = handler(path, max_bytes=0)
+    other.emit(record("other before"))  # keeps the file open
+
+    for i in range(3):
+        small.emit(record(f"rotating {i} " + "x" * 20))
+    other.emit(record("other after"))
+    small.close()
+    other.close()
+
+    assert "other after" in lines(path)
+    assert "other after" not in lines(f"{path}.1")
+
+
+def test_queued_records_keep_their_traceback():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        queued = ResultQueueHandler(None).prepare(record("failed", sys.exc_info()))
+
+    entry = json.loads(JsonFormatter().format(queued))
+
+    assert entry["message"] == "failed"
+    assert entry["error"].splitlines()[-1] == "ValueError: boom"
+
+
+@pytest.fixture
+def results(monkeypatch):
+    """Records logged to the results logger"""
+    captured = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            captured.append(record)
+
+    monkeypatch.setattr(result_log.logger, "handlers", [Capture()])
+    monkeypatch.setattr(result_log.logger, "propagate", False)
+    return captured
+
+
+def test_flow_verdicts_are_not_outcomes(results):
+    result_log.verdict("login_test", True, "Login successful")
+    result_log.verdict("assign_issue_test", False, "Could not confirm assignment")
+    result_log.result("test_assign_issue", False, "AssertionError", duration=1.5)
+
+    outcomes = [r for r in results if getattr(r, "outcome", None)]
+    assert [(r.test, r.outcome) for r in outcomes] == [("test_assign_issue", "failed")]
+    assert results[1].levelno == logging.ERROR
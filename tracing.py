@@ -0,0 +1,161 @@
+"""Step timing in Chrome trace-event format.
+
+Wrap flows and their sub-steps in spans and open the resulting JSON in
+chrome://tracing, Perfetto or speedscope:
+
+    @traced()
+    def report_issue(driver): ...
+
+    with step("fill_form"):
+        ...
+
+Tracing is off unless MANTIS_TRACE=1 (or enable() is called); disabled
+spans cost one attribute lookup.
+"""
+import functools
+import json
+import logging
+import multiprocessing.util
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config import TRACE, TRACE_DIR
+
+
+class Tracer:
+    """Collects complete ("X") and instant ("i") trace events in memory"""
+
+    def __init__(self):
+        self.events = []
+        # Forked workers inherit the tracer; events carry the pid at record time
+        self.owner = os.getpid()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def now():
+        return time.perf_counter_ns() // 1000
+
+    def add(self, name, cat, start, dur, args=None):
+        event = {"name": name, "cat": cat, "ph": "X", "ts": start, "dur": dur,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, cat="step", **args):
+        start = self.now()
+        if cat == "flow":
+            self._local.phase_start = start
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.add(name, cat, start, self.now() - start, args)
+
+    def phase(self, name, **args):
+        """Close the phase that ends at this point of the flow.
+
+        The span runs from the previous phase mark (or the start of the
+        enclosing flow) to now and is named after the step just reached.
+        """
+        now = self.now()
+        start = getattr(self._local, "phase_start", None)
+        if start is not None:
+            self.add(name, "phase", start, now - start, args)
+        self._local.phase_start = now
+
+    def drain(self):
+        """Take every event recorded so far"""
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+
+_tracer = Tracer() if TRACE else None
+
+
+def enable():
+    """Start tracing in this process; a tracer inherited through fork is replaced"""
+    global _tracer
+    if _tracer is None or _tracer.owner != os.getpid():
+        _tracer = Tracer()
+        multiprocessing.util.Finalize(None, write, exitpriority=15)
+
+
+def enabled():
+    return _tracer is not None
+
+
+@contextmanager
+def step(name, cat="step", **args):
+    """Time the `with` block as one span; yields a dict for extra span args"""
+    if _tracer is None:
+        yield args
+        return
+    with _tracer.span(name, cat, **args) as span_args:
+        yield span_args
+
+
+def traced(name=None, cat="flow"):
+    """Decorator form of step(); the span is named after the function by default"""
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def phase(name, **args):
+    if _tracer is not None:
+        _tracer.phase(name, **args)
+
+
+def instrument(driver):
+    """Record every WebDriver command of this driver as a span"""
+    execute = driver.execute
+
+    def traced_execute(driver_command, params=None):
+        if _tracer is None:
+            return execute(driver_command, params)
+        with _tracer.span(driver_command, "webdriver"):
+            return execute(driver_command, params)
+
+    driver.execute = traced_execute
+    return driver
+
+
+def drain():
+    return _tracer.drain() if _tracer is not None else []
+
+
+def write_events(events, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    logging.info(f"Trace written to {path} ({len(events)} events)")
+    return path
+
+
+def write(path=None):
+    """Write this process's remaining events to a trace file"""
+    events = drain()
+    if not events:
+        return None
+    path = path or os.path.join(TRACE_DIR, f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+    return write_events(events, path)
+
+
+if _tracer is not None:
+    multiprocessing.util.Finalize(None, write, exitpriority=15)
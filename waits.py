@@ -0,0 +1,214 @@
+"""Condition-driven waits for the MantisBT flows.
+
+Conditions are plain callables taking the driver and returning a truthy
+value once met, so they work with WebDriverWait and with each other:
+
+    wait_for(driver, any_of(success_banner(), url_contains("view.php")))
+"""
+import json
+import time
+import weakref
+from contextlib import contextmanager
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+import tracing
+
+DEFAULT_TIMEOUT = 30
+POLL_INTERVAL = 0.1
+
+# WebDriver commands that replace the current document
+NAVIGATION_COMMANDS = {"get", "goBack", "goForward", "refresh"}
+
+_loads = weakref.WeakKeyDictionary()
+_urls = weakref.WeakKeyDictionary()
+
+SUCCESS_BANNER_JS = """
+var alert = document.querySelector('.alert-success, .success-msg');
+var text = (alert || document.body || {}).innerText || '';
+return text.indexOf('Operation successful') !== -1;
+"""
+
+
+def wait_for(driver, condition, timeout=DEFAULT_TIMEOUT, message=""):
+    """Block until `condition` is met and return its value"""
+    with tracing.step("wait_for", "wait", message=message):
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(condition, message)
+
+
+def all_of(*conditions):
+    """Met once every condition is met"""
+    def condition(driver):
+        results = []
+        for check in conditions:
+            result = check(driver)
+            if not result:
+                return False
+            results.append(result)
+        return results
+    return condition
+
+
+def any_of(*conditions):
+    """Met as soon as one condition is met; returns that condition's value"""
+    def condition(driver):
+        for check in conditions:
+            result = check(driver)
+            if result:
+                return result
+        return False
+    return condition
+
+
+def document_ready():
+    def condition(driver):
+        return driver.execute_script("return document.readyState") == "complete"
+    return condition
+
+
+def url_changed(old_url):
+    def condition(driver):
+        return driver.current_url != old_url
+    return condition
+
+
+def url_contains(fragment):
+    return EC.url_contains(fragment)
+
+
+def staleness_of(element):
+    return EC.staleness_of(element)
+
+
+def element_present(locator):
+    return EC.presence_of_element_located(locator)
+
+
+def success_banner():
+    """MantisBT's "Operation successful" confirmation after a form submit"""
+    def condition(driver):
+        return driver.execute_script(SUCCESS_BANNER_JS)
+    return condition
+
+
+class network_idle:
+    """Met when no request has been in flight for `quiet` seconds.
+
+    Reads CDP Network events from Chrome's performance log (enabled by
+    NETWORK_LOG / MANTIS_NETWORK_LOG=1). Without that log it falls back to
+    watching the Resource Timing entry count settle.
+    """
+
+    def __init__(self, quiet=0.5):
+        self.quiet = quiet
+        self.inflight = set()
+        self.last_activity = time.monotonic()
+        self.use_cdp = True
+        self.resource_count = -1
+
+    def __call__(self, driver):
+        if self.use_cdp:
+            try:
+                self._read_cdp_events(driver)
+            except WebDriverException:
+                self.use_cdp = False
+        if not self.use_cdp:
+            self._read_resource_timing(driver)
+
+        return not self.inflight and time.monotonic() - self.last_activity >= self.quiet
+
+    def _read_cdp_events(self, driver):
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method = message.get("method", "")
+            request_id = message.get("params", {}).get("requestId")
+            if method == "Network.requestWillBeSent":
+                self.inflight.add(request_id)
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                self.inflight.discard(request_id)
+            else:
+                continue
+            self.last_activity = time.monotonic()
+
+    def _read_resource_timing(self, driver):
+        count = driver.execute_script("return performance.getEntriesByType('resource').length")
+        if count != self.resource_count:
+            self.resource_count = count
+            self.last_activity = time.monotonic()
+
+
+def mark_loaded(driver):
+    """Record that `driver` now shows a new document"""
+    _loads[driver] = _loads.get(driver, 0) + 1
+    _urls.pop(driver, None)
+
+
+def load_count(driver):
+    """Number of documents `driver` has loaded; changes on every navigation.
+
+    Counts driver.get/back/forward/refresh (see track_loads) and every
+    navigation() block. Page objects key their element caches on it.
+    """
+    return _loads.get(driver, 0)
+
+
+def known_url(driver):
+    """URL of the current document if a command already revealed it, else None.
+
+    Costs no round-trip: it is the last current_url read since the last
+    navigation. A driver.get() does not count, as redirects (login,
+    bug_report.php -> view.php) can land somewhere else.
+    """
+    return _urls.get(driver)
+
+
+def landed_url(driver):
+    """URL of the current document, read from the browser unless already known.
+
+    For failures and debug logging only: every other step makes do with
+    known_url(). None when the browser does not answer.
+    """
+    url = _urls.get(driver)
+    if url is None:
+        try:
+            url = driver.current_url
+        except Exception:  # a dead chromedriver raises urllib3 errors too
+            return None
+    return url
+
+
+def track_loads(driver):
+    """Count the documents this driver loads through navigation commands"""
+    execute = driver.execute
+
+    def tracked_execute(driver_command, params=None):
+        try:
+            response = execute(driver_command, params)
+        finally:
+            if driver_command in NAVIGATION_COMMANDS:
+                mark_loaded(driver)
+        if driver_command == "getCurrentUrl":
+            _urls[driver] = response["value"]
+        return response
+
+    driver.execute = tracked_execute
+    return driver
+
+
+@contextmanager
+def navigation(driver, timeout=DEFAULT_TIMEOUT, until=None):
+    """Wait for the page load triggered inside the `with` block.
+
+    Finishes once the old document is gone and the new one is ready, or
+    as soon as the optional `until` condition is met.
+    """
+    with tracing.step("navigation", "wait"):
+        old_page = driver.find_element(By.TAG_NAME, "html")
+        yield
+        loaded = all_of(staleness_of(old_page), document_ready())
+        try:
+            wait_for(driver, any_of(until, loaded) if until else loaded, timeout,
+                     "Page did not load after navigation")
+        finally:
+            mark_loaded(driver)